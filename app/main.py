@@ -11,19 +11,27 @@ Arquitetura:
 - utils/: Utilitários e helpers
 """
 
+import argparse
 import sys
 import os
+import time
 
 # Adiciona o diretório raiz ao path para imports funcionarem
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from datetime import datetime
+from typing import Callable, List, Optional
+import pandas as pd
 from config.settings import settings
 from utils.logger import setup_logger
 from app.scheduler import ScheduleManager
 from services.api_client import APIClient
 from services.data_processor import DataProcessor
 from services.file_handler import FileHandler
+from services.stream_aggregator import StreamingAggregator
+from services.query_plan import QueryPlan
+from services.shard_coordinator import LeaseRenewer, ShardCoordinator
+from services.checkpoint import CheckpointManager
 
 # Configura logger
 logger = setup_logger(__name__)
@@ -32,7 +40,7 @@ logger = setup_logger(__name__)
 class Application:
     """Classe principal da aplicação"""
     
-    def __init__(self):
+    def __init__(self, shard_mode: bool = False, resume: bool = False):
         logger.info("="*70)
         logger.info("SISTEMA DE COLETA E PROCESSAMENTO DE DADOS v2.0")
         logger.info("="*70)
@@ -41,6 +49,9 @@ class Application:
         logger.info(f"Encoding: {settings.FILE_ENCODING}")
         logger.info("")
         
+        self.shard_mode = shard_mode
+        self.resume = resume
+        
         # Inicializa componentes
         self.scheduler = ScheduleManager()
         self.api_client = APIClient()
@@ -54,6 +65,10 @@ class Application:
         
         self._setup_directories()
     
+    def encerrar(self):
+        """Libera recursos ao fim da execução (armazenamento temporário de deduplicação)"""
+        self.data_processor.close()
+    
     def _setup_directories(self):
         """Configura diretórios necessários"""
         try:
@@ -61,6 +76,46 @@ class Application:
         except OSError as e:
             logger.error(f"Erro ao criar diretório: {e}")
     
+    def _load_aggregator(self) -> StreamingAggregator:
+        """
+        Cria o agregador do resumo, mesclando execuções anteriores se configurado
+        
+        Com DEDUP_ACROSS_RUNS o Excel acumula as execuções (`_acumular_saida`),
+        então o resumo também acumula, para descrever o arquivo inteiro.
+        """
+        aggregator = StreamingAggregator()
+        
+        if settings.SUMMARY_MERGE_PREVIOUS or settings.DEDUP_ACROSS_RUNS:
+            state = self.file_handler.load_summary_state()
+            if state is not None:
+                aggregator = StreamingAggregator.from_state(state)
+                logger.info(f"Estado anterior carregado: {aggregator.total_registros} registros")
+        
+        return aggregator
+    
+    def _acumular_saida(self, df_novo: pd.DataFrame) -> pd.DataFrame:
+        """
+        Acrescenta os registros novos ao Excel existente (DEDUP_ACROSS_RUNS)
+        
+        Com deduplicação entre execuções cada execução só produz registros
+        inéditos; sobrescrever o arquivo descartaria os exportados antes.
+        
+        Args:
+            df_novo: Registros desta execução
+            
+        Returns:
+            DataFrame a ser gravado em OUTPUT_FILENAME
+        """
+        if not settings.DEDUP_ACROSS_RUNS:
+            return df_novo
+        
+        df_anterior = self.file_handler.load_excel(settings.OUTPUT_FILENAME)
+        if df_anterior is None or df_anterior.empty:
+            return df_novo
+        
+        logger.info(f"Acrescentando {len(df_novo)} registros novos aos {len(df_anterior)} já exportados")
+        return pd.concat([df_anterior, df_novo], ignore_index=True)
+    
     def executar(self) -> bool:
         """
         Método principal que orquestra a execução
@@ -77,39 +132,28 @@ class Application:
                  self.scheduler.aguardar_proximo_horario()
                  return False
             
-            # Passo 2: Coleta dados da API
-            logger.info("\nPASSO 2: Coletando dados da API...")
-            dados = self.api_client.fetch_users()
-            
-            if dados is None:
-                logger.error("✗ Falha ao coletar dados da API")
-                return False
-            
-            # Passo 3: Processa dados
-            logger.info("\nPASSO 3: Processando e validando dados...")
-            df_processado = self.data_processor.process_users(dados)
+            if self.shard_mode:
+                return self._executar_shards()
             
-            if df_processado is None or df_processado.empty:
-                logger.error("✗ Falha no processamento dos dados")
-                return False
+            plano = self.data_processor.build_query_plan()
             
-            # Passo 4: Gera resumo
-            logger.info("\nPASSO 4: Gerando resumo estatístico...")
-            summary = self.data_processor.generate_summary(df_processado)
+            checkpoint = None
+            if settings.CHECKPOINT_ENABLED:
+                checkpoint = CheckpointManager(self._checkpoint_fingerprint(plano), resume=self.resume)
             
-            # Passo 5: Salva arquivos
-            logger.info("\nPASSO 5: Salvando arquivos...")
+            df_processado = self._executar_pipeline(plano, checkpoint=checkpoint)
             
-            # Salva Excel
-            excel_ok = self.file_handler.save_to_excel(df_processado)
-            if not excel_ok:
-                logger.error("✗ Falha ao salvar arquivo Excel")
+            if df_processado is None:
+                if checkpoint is not None:
+                    logger.info("Progresso salvo; use --resume para continuar")
                 return False
             
-            # Salva resumo
-            summary_ok = self.file_handler.save_summary(summary)
-            if not summary_ok:
-                logger.warning("⚠ Falha ao salvar resumo (não crítico)")
+            if checkpoint is not None:
+                checkpoint.clear()
+            
+            if df_processado.empty:
+                logger.warning("⚠ Nenhum registro novo nesta execução; arquivos anteriores mantidos")
+                return True
             
             # Sucesso!
             logger.info("\n" + "="*70)
@@ -129,14 +173,387 @@ class Application:
             logger.error(f"\n✗ Erro inesperado durante execução: {e}")
             logger.exception("Detalhes completos do erro:")
             return False
+    
+    def _checkpoint_fingerprint(self, plano: QueryPlan) -> str:
+        """Identifica a configuração da coleta; checkpoints de outra são descartados"""
+        return "|".join([
+            settings.get_api_url(),
+            plano.describe(),
+            str(settings.API_PAGE_SIZE),
+            ",".join(sorted(settings.API_RELATED_ENDPOINTS)),
+        ])
+    
+    def _coletar_com_checkpoint(self, plano: QueryPlan, checkpoint: CheckpointManager):
+        """
+        Coleta usuários e recursos relacionados gravando checkpoints
+        
+        Páginas e endpoints já presentes no checkpoint não são buscados
+        novamente. Sem paginação (API_PAGE_SIZE) não há posição de onde
+        retomar: os usuários são buscados de novo e só os endpoints
+        relacionados ficam no checkpoint.
+        
+        Args:
+            plano: Plano de consulta dos usuários
+            checkpoint: Gerenciador de checkpoints
+            
+        Returns:
+            Tupla (usuários, relacionados) ou None em caso de falha
+        """
+        inicio = time.perf_counter()
+        
+        if settings.API_PAGE_SIZE is None:
+            dados = self.api_client.fetch_users(plano)
+            if dados is None:
+                return None
+        else:
+            if not checkpoint.collection_done:
+                page = checkpoint.next_page
+                if page > 1:
+                    logger.info(f"Retomando coleta na página {page}")
+                
+                while True:
+                    result = self.api_client.fetch_users_page(plano, page)
+                    if result is None:
+                        checkpoint.flush()
+                        return None
+                    
+                    records, last_page = result
+                    checkpoint.add_page(page, records, last_page)
+                    if last_page:
+                        break
+                    page += 1
+            
+            dados = checkpoint.load_records()
+            logger.info(f"✓ Dados coletados: {len(dados)} registros")
+        
+        pendentes = checkpoint.pending_related(settings.API_RELATED_ENDPOINTS)
+        relacionados = self.api_client.fetch_related(plano, pendentes) if pendentes else {}
+        for name, items in relacionados.items():
+            if items is not None:
+                checkpoint.save_related(name, items)
+        relacionados.update(checkpoint.load_related())
+        
+        checkpoint.report(time.perf_counter() - inicio)
+        return dados, relacionados
+    
+    def _executar_pipeline(self, plano: QueryPlan, shard_id: Optional[int] = None,
+                           heartbeat: Optional[Callable[[], bool]] = None,
+                           checkpoint: Optional[CheckpointManager] = None) -> Optional[pd.DataFrame]:
+        """
+        Executa coleta, processamento, resumo e gravação dos arquivos
+        
+        Se a tentativa falhar (retorno None ou exceção), as chaves de
+        deduplicação registradas nela são descartadas, para que uma nova
+        tentativa (ou outro shard) não trate esses registros como repetidos.
+        
+        Args:
+            plano: Plano de consulta dos usuários
+            shard_id: Shard processado (arquivos parciais) ou None
+            heartbeat: Chamado entre os passos; retorna False para abortar
+            checkpoint: Gerenciador de checkpoints da coleta (opcional)
+            
+        Returns:
+            DataFrame processado (vazio se não houver registros novos) ou None
+        """
+        df_processado = None
+        try:
+            df_processado = self._executar_etapas(plano, shard_id, heartbeat, checkpoint)
+            return df_processado
+        finally:
+            if df_processado is None:
+                self.data_processor.rollback_dedup()
+    
+    def _executar_etapas(self, plano: QueryPlan, shard_id: Optional[int],
+                         heartbeat: Optional[Callable[[], bool]],
+                         checkpoint: Optional[CheckpointManager]) -> Optional[pd.DataFrame]:
+        """
+        Executa os passos 2 a 5 do pipeline (ver `_executar_pipeline`)
+        
+        Args:
+            plano: Plano de consulta dos usuários
+            shard_id: Shard processado (arquivos parciais) ou None
+            heartbeat: Chamado entre os passos; retorna False para abortar
+            checkpoint: Gerenciador de checkpoints da coleta (opcional)
+            
+        Returns:
+            DataFrame processado (vazio se não houver registros novos) ou None
+        """
+        excel_filename = settings.OUTPUT_FILENAME
+        summary_filename = "summary.json"
+        state_filename = settings.SUMMARY_STATE_FILENAME
+        if shard_id is not None:
+            excel_filename = settings.get_shard_filename(excel_filename, shard_id)
+            summary_filename = settings.get_shard_filename(summary_filename, shard_id)
+            state_filename = settings.get_shard_filename(state_filename, shard_id)
+        saidas_shard = (excel_filename, summary_filename, state_filename) if shard_id is not None else ()
+        
+        # Passo 2: Coleta dados da API
+        logger.info("\nPASSO 2: Coletando dados da API...")
+        if checkpoint is not None:
+            coleta = self._coletar_com_checkpoint(plano, checkpoint)
+            dados, relacionados = coleta if coleta is not None else (None, None)
+        else:
+            dados = self.api_client.fetch_users(plano)
+        
+        if dados is None:
+            logger.error("✗ Falha ao coletar dados da API")
+            return None
+        
+        # Shard sem registros na faixa: remove saídas antigas e conclui
+        if shard_id is not None and not dados:
+            logger.info(f"Shard {shard_id} sem registros")
+            for filename in saidas_shard:
+                self.file_handler.remove_file(filename)
+            return pd.DataFrame()
+        
+        if checkpoint is None:
+            relacionados = self.api_client.fetch_related(plano)
+        
+        if heartbeat is not None and not heartbeat():
+            return None
+        
+        # Passo 3: Processa dados
+        logger.info("\nPASSO 3: Processando e validando dados...")
+        aggregator = StreamingAggregator()
+        df_processado = self.data_processor.process_users(dados, relacionados, aggregator, plano)
+        
+        if df_processado is None:
+            logger.error("✗ Falha no processamento dos dados")
+            return None
+        
+        # Todos os registros já exportados antes: nada a gravar (shard é concluído sem saídas)
+        if df_processado.empty:
+            logger.warning("⚠ Nenhum registro novo para exportar")
+            for filename in saidas_shard:
+                self.file_handler.remove_file(filename)
+            return df_processado
+        
+        # Passo 4: Gera resumo (shards não mesclam estado anterior; o merge faz isso)
+        logger.info("\nPASSO 4: Gerando resumo estatístico...")
+        if shard_id is None:
+            aggregator_acumulado = self._load_aggregator()
+        else:
+            aggregator_acumulado = StreamingAggregator()
+        summary = self.data_processor.generate_summary(aggregator, aggregator_acumulado)
+        
+        if heartbeat is not None and not heartbeat():
+            return None
+        
+        # Passo 5: Salva arquivos
+        logger.info("\nPASSO 5: Salvando arquivos...")
+        
+        # Salva Excel (shards gravam só a parte nova; o merge acumula)
+        df_saida = df_processado if shard_id is not None else self._acumular_saida(df_processado)
+        excel_ok = self.file_handler.save_to_excel(df_saida, excel_filename)
+        if not excel_ok:
+            logger.error("✗ Falha ao salvar arquivo Excel")
+            return None
+        
+        # Registra chaves exportadas para deduplicação futura
+        self.data_processor.commit_dedup()
+        
+        # Salva resumo
+        summary_ok = self.file_handler.save_summary(summary, summary_filename)
+        if not summary_ok:
+            logger.warning("⚠ Falha ao salvar resumo (não crítico)")
+        
+        # Salva estado mesclável do resumo
+        if not self.file_handler.save_summary_state(aggregator_acumulado.to_state(), state_filename):
+            logger.warning("⚠ Falha ao salvar estado do resumo (não crítico)")
+        
+        return df_processado
+    
+    def _executar_shards(self) -> bool:
+        """
+        Processa shards reivindicados até que todos estejam concluídos
+        
+        Instâncias sem shard disponível aguardam para assumir leases expirados
+        de instâncias que morreram. A última etapa (merge) é executada por
+        uma única instância.
+        
+        Tentativas com falha são devolvidas e repetidas (até
+        SHARD_MAX_ATTEMPTS); o resultado depende apenas de todos os shards
+        terem sido concluídos e do merge.
+        
+        Returns:
+            True se todos os shards e o merge foram concluídos
+        """
+        coordinator = ShardCoordinator()
+        coordinator.initialize()
+        logger.info(f"Modo shard: execução {coordinator.run_id}, instância {coordinator.owner}")
+        
+        if coordinator.merge_done():
+            logger.warning(
+                f"⚠ Execução {coordinator.run_id} já concluída; para processar de novo "
+                "use outro SHARD_RUN_ID ou --reset-shards"
+            )
+            return True
+        
+        plano_base = self.data_processor.build_query_plan()
+        
+        while True:
+            shard = coordinator.claim()
+            
+            if shard is None:
+                if coordinator.all_done():
+                    break
+                time.sleep(settings.SHARD_POLL_SECONDS)
+                continue
+            
+            shard_id = shard["shard_id"]
+            logger.info("\n" + "="*70)
+            logger.info(f"SHARD {shard_id}: IDs {shard['id_inicio']}-{shard['id_fim']}")
+            logger.info("="*70)
+            
+            plano = plano_base.with_filters([
+                ("id", ">=", shard["id_inicio"]),
+                ("id", "<=", shard["id_fim"]),
+            ])
+            
+            # Lease renovado em segundo plano; as etapas só verificam se ele foi perdido
+            renovador = LeaseRenewer(coordinator.run_id, coordinator.owner, shard_id)
+            renovador.start()
+            try:
+                df_shard = self._executar_pipeline(plano, shard_id, heartbeat=renovador.held)
+            except Exception as e:
+                logger.error(f"✗ Erro no shard {shard_id}: {e}")
+                df_shard = None
+            finally:
+                renovador.stop()
+            
+            if df_shard is None or not coordinator.complete(shard_id):
+                coordinator.release(shard_id)
+        
+        falhos = coordinator.failed_shards()
+        if falhos:
+            logger.error(f"✗ Shards com falha: {falhos}; merge não executado")
+            logger.info(f"Para tentar de novo: --reset-shards (execução {coordinator.run_id}) ou outro SHARD_RUN_ID")
+            return False
+        
+        if not coordinator.claim_merge():
+            logger.info("Merge executado por outra instância")
+            return True
+        
+        try:
+            merge_ok = self._merge_shards(coordinator.completed_shards())
+        except Exception:
+            coordinator.release_merge()
+            raise
+        
+        if merge_ok:
+            coordinator.complete_merge()
+        else:
+            coordinator.release_merge()
+        
+        return merge_ok
+    
+    def resetar_shards(self) -> bool:
+        """
+        Descarta o estado da execução de shards atual (SHARD_RUN_ID)
+        
+        Deve ser executado uma vez, sem instâncias da execução em andamento,
+        antes de reprocessar uma execução concluída ou com shards falhos.
+        
+        Returns:
+            True se o estado foi descartado
+        """
+        coordinator = ShardCoordinator()
+        return coordinator.reset() is not None
+    
+    def _merge_shards(self, shard_ids: List[int]) -> bool:
+        """
+        Combina arquivos Excel e resumos parciais dos shards
+        
+        Args:
+            shard_ids: Shards concluídos
+            
+        Returns:
+            True se o merge foi concluído
+        """
+        logger.info("\n" + "="*70)
+        logger.info(f"MERGE: combinando {len(shard_ids)} shards")
+        logger.info("="*70)
+        
+        partes = []
+        summaries = []
+        aggregator = self._load_aggregator()
+        
+        for shard_id in shard_ids:
+            df_shard = self.file_handler.load_excel(
+                settings.get_shard_filename(settings.OUTPUT_FILENAME, shard_id)
+            )
+            if df_shard is None:
+                # Shard sem registros
+                continue
+            partes.append(df_shard)
+            
+            summary = self.file_handler.load_summary(settings.get_shard_filename("summary.json", shard_id))
+            state = self.file_handler.load_summary_state(
+                settings.get_shard_filename(settings.SUMMARY_STATE_FILENAME, shard_id)
+            )
+            if summary is None or state is None:
+                logger.error(f"✗ Resumo do shard {shard_id} ausente")
+                return False
+            summaries.append(summary)
+            aggregator.merge(StreamingAggregator.from_state(state))
+        
+        if not partes:
+            logger.warning("⚠ Nenhum shard gerou registros novos; arquivos anteriores mantidos")
+            return True
+        
+        df_final = pd.concat(partes, ignore_index=True).sort_values('id', ignore_index=True)
+        df_final = self._acumular_saida(df_final)
+        
+        if not self.file_handler.save_to_excel(df_final):
+            logger.error("✗ Falha ao salvar arquivo Excel combinado")
+            return False
+        
+        summary = self.data_processor.merge_summaries(summaries, aggregator)
+        if not self.file_handler.save_summary(summary):
+            logger.warning("⚠ Falha ao salvar resumo (não crítico)")
+        
+        if not self.file_handler.save_summary_state(aggregator.to_state()):
+            logger.warning("⚠ Falha ao salvar estado do resumo (não crítico)")
+        
+        logger.info(f"✓ Merge concluído: {len(df_final)} registros em {settings.get_output_path()}")
+        return True
 
 
 def main():
     """Função de entrada da aplicação"""
+    parser = argparse.ArgumentParser(description="Sistema de Coleta e Processamento de Dados")
+    parser.add_argument(
+        "--shard", action="store_true", default=settings.SHARD_MODE,
+        help="Processa faixas de IDs coordenadas com outras instâncias (SHARD_MODE)"
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Continua a coleta a partir do último checkpoint em OUTPUT_DIR"
+    )
+    parser.add_argument(
+        "--reset-shards", action="store_true",
+        help="Descarta o estado da execução de shards atual (SHARD_RUN_ID) e encerra"
+    )
+    parser.add_argument(
+        "--wait", action="store_true",
+        help="Aguarda o próximo horário de execução (HORARIO_EXECUCAO) em vez de encerrar"
+    )
+    args = parser.parse_args()
+    
+    # Shards não gravam checkpoints: a retomada é feita pelos leases
+    if args.shard and args.resume:
+        parser.error("--resume não é suportado no modo shard (--shard/SHARD_MODE)")
+    
     try:
         # Cria e executa aplicação
-        app = Application()
-        sucesso = app.executar()
+        app = Application(shard_mode=args.shard, resume=args.resume)
+        if args.reset_shards:
+            sucesso = app.resetar_shards()
+        else:
+            if args.wait:
+                app.scheduler.esperar_horario()
+            sucesso = app.executar()
+        app.encerrar()
         
         # Define código de saída
         sys.exit(0 if sucesso else 1)
@@ -149,4 +566,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
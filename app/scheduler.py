@@ -2,6 +2,7 @@
 Gerenciador de agendamento e controle de horário
 """
 
+import time
 from datetime import datetime
 from config.settings import settings
 from utils.logger import setup_logger
@@ -55,4 +56,12 @@ class ScheduleManager:
         logger.info(f"Horário: {execucao_proxima.strftime('%Y-%m-%d %H:%M:%S')}")
         
         return tempo_espera
+    
+    def esperar_horario(self):
+        """Bloqueia até o horário permitido (retorna logo se já for o horário)"""
+        if datetime.now().strftime("%H:%M") == self.horario_permitido:
+            return
+        
+        tempo_espera = self.aguardar_proximo_horario()
+        time.sleep(tempo_espera.total_seconds())
 
@@ -0,0 +1,110 @@
+"""
+Benchmark da união dos recursos relacionados aos usuários
+
+Compara o hash join do DataProcessor (group-by por chave estrangeira +
+merge) com a abordagem anterior de uma consulta por usuário (N+1),
+usando dados sintéticos gerados com semente fixa.
+
+Uso:
+    python benchmarks/bench_related_join.py --users 1000000 --sample 200
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# Adiciona o diretório raiz ao path para imports funcionarem
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from config.settings import settings
+from services.data_processor import DataProcessor
+
+
+def gerar_dados(n_users: int, itens_por_usuario: int, seed: int):
+    """
+    Gera usuários e recursos relacionados sintéticos
+
+    Args:
+        n_users: Quantidade de usuários
+        itens_por_usuario: Média de itens por usuário em cada recurso
+        seed: Semente do gerador aleatório
+
+    Returns:
+        Tupla (DataFrame de usuários, mapa nome -> itens)
+    """
+    rng = random.Random(seed)
+    foreign_key = settings.API_RELATED_FOREIGN_KEY
+    n_itens = n_users * itens_por_usuario
+
+    df_users = pd.DataFrame({"id": range(1, n_users + 1)})
+    related = {
+        "posts": [{"id": i, foreign_key: rng.randint(1, n_users)} for i in range(n_itens)],
+        "todos": [
+            {"id": i, foreign_key: rng.randint(1, n_users), "completed": rng.random() < 0.5}
+            for i in range(n_itens)
+        ],
+        "albums": [{"id": i, foreign_key: rng.randint(1, n_users)} for i in range(n_itens)],
+    }
+    return df_users, related
+
+
+def join_hash(processor: DataProcessor, df_users: pd.DataFrame, related) -> pd.DataFrame:
+    """União atual: uma agregação por recurso e um merge"""
+    return processor._join_related(df_users, processor._aggregate_related(related))
+
+
+def join_por_usuario(df_users: pd.DataFrame, related, amostra: int) -> float:
+    """
+    União anterior: filtra os itens de cada usuário individualmente
+
+    Args:
+        df_users: DataFrame de usuários
+        related: Itens de cada recurso por nome
+        amostra: Quantidade de usuários medidos
+
+    Returns:
+        Segundos gastos com a amostra
+    """
+    foreign_key = settings.API_RELATED_FOREIGN_KEY
+    frames = {name: pd.DataFrame(items) for name, items in related.items()}
+
+    start = time.perf_counter()
+    for user_id in df_users["id"].head(amostra):
+        for name, df_related in frames.items():
+            itens = df_related[df_related[foreign_key] == user_id]
+            for source, func in settings.RELATED_AGGREGATIONS[name].values():
+                itens[source].agg(func)
+    return time.perf_counter() - start
+
+
+def main():
+    """Executa o benchmark e imprime os tempos"""
+    parser = argparse.ArgumentParser(description="Benchmark da união dos recursos relacionados")
+    parser.add_argument("--users", type=int, default=100000, help="Quantidade de usuários")
+    parser.add_argument("--items-per-user", type=int, default=10, help="Itens por usuário em cada recurso")
+    parser.add_argument("--sample", type=int, default=100, help="Usuários medidos na abordagem por usuário")
+    parser.add_argument("--seed", type=int, default=42, help="Semente dos dados sintéticos")
+    args = parser.parse_args()
+
+    df_users, related = gerar_dados(args.users, args.items_per_user, args.seed)
+    processor = DataProcessor()
+
+    start = time.perf_counter()
+    df = join_hash(processor, df_users, related)
+    tempo_hash = time.perf_counter() - start
+
+    amostra = min(args.sample, args.users)
+    tempo_amostra = join_por_usuario(df_users, related, amostra)
+    tempo_estimado = tempo_amostra / amostra * args.users
+
+    print(f"Usuários: {args.users}, itens por recurso: {args.users * args.items_per_user}")
+    print(f"Hash join:           {tempo_hash:10.2f}s ({len(df)} linhas, {len(df.columns)} colunas)")
+    print(f"Consulta p/ usuário: {tempo_estimado:10.2f}s (estimado a partir de {amostra} usuários)")
+    print(f"Ganho:               {tempo_estimado / tempo_hash:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,31 @@ class Settings:
     API_BASE_URL = "https://jsonplaceholder.typicode.com"
     API_USERS_ENDPOINT = "/users"
     API_TIMEOUT = 10
+
+    # Paginação (estilo json-server); None busca tudo em uma requisição
+    API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE")) if os.getenv("API_PAGE_SIZE") else None
+    API_PAGE_PARAM = "_page"
+    API_LIMIT_PARAM = "_limit"
+
+    # Endpoints relacionados coletados em paralelo e unidos aos usuários
+    API_RELATED_ENDPOINTS = {
+        "posts": "/posts",
+        "todos": "/todos",
+        "albums": "/albums",
+    }
+    API_RELATED_FOREIGN_KEY = "userId"
+    API_MAX_WORKERS = 4
+
+    # Rate limit das chamadas à API (token bucket)
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "10"))
+    RATE_LIMIT_BURST = 5
+    # Fração do limite efetivamente usada, para ficar logo abaixo dele
+    RATE_LIMIT_SAFETY_FACTOR = 0.9
+    # Compartilha o bucket entre processos do host via arquivo em OUTPUT_DIR
+    RATE_LIMIT_SHARED = os.getenv("RATE_LIMIT_SHARED", "true").lower() == "true"
+    RATE_LIMIT_FILENAME = "rate_limit.sqlite3"
+    RATE_LIMIT_MAX_RETRIES = 3
     
     # Schedule Configuration
     HORARIO_EXECUCAO = "14:00"
@@ -38,7 +63,64 @@ class Settings:
     
     # Campos opcionais que podem estar presentes
     OPTIONAL_FIELDS = ["company", "address", "geo_location"]
-    
+
+    # Filtros aplicados aos registros: (campo, operador, valor)
+    QUERY_FILTERS = [("id", "<=", FILTER_TOP_N)]
+
+    # Agregações dos endpoints relacionados por usuário:
+    # coluna de saída -> (coluna de origem, função de agregação)
+    RELATED_AGGREGATIONS = {
+        "posts": {"total_posts": ("id", "count")},
+        "todos": {
+            "total_todos": ("id", "count"),
+            "taxa_todos_concluidos": ("completed", "mean"),
+        },
+        "albums": {"total_albums": ("id", "count")},
+    }
+
+    # Deduplicação de registros (Bloom filter + armazenamento em disco)
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    DEDUP_ACROSS_RUNS = os.getenv("DEDUP_ACROSS_RUNS", "false").lower() == "true"
+    DEDUP_KEYS = ["id", "email"]
+    DEDUP_EXPECTED_ITEMS = 1000000
+    DEDUP_FALSE_POSITIVE_RATE = 0.01
+    DEDUP_STORE_FILENAME = "dedup_keys.sqlite3"
+
+    # Checkpoints da coleta (retomada com --resume)
+    CHECKPOINT_ENABLED = os.getenv("CHECKPOINT_ENABLED", "true").lower() == "true"
+    CHECKPOINT_EVERY_PAGES = int(os.getenv("CHECKPOINT_EVERY_PAGES", "1"))
+    CHECKPOINT_DIRNAME = "checkpoint"
+
+    # Execução em shards (várias instâncias coordenadas via SQLite)
+    SHARD_MODE = os.getenv("SHARD_MODE", "false").lower() == "true"
+    SHARD_COUNT = int(os.getenv("SHARD_COUNT", "4"))
+    # Faixa de IDs dividida entre os shards (a mesma mantida por QUERY_FILTERS)
+    SHARD_ID_MIN = 1
+    SHARD_ID_MAX = FILTER_TOP_N
+    SHARD_LEASE_SECONDS = int(os.getenv("SHARD_LEASE_SECONDS", "300"))
+    SHARD_MAX_ATTEMPTS = 3
+    SHARD_POLL_SECONDS = 5
+    SHARD_DB_FILENAME = "shards.sqlite3"
+    # SHARD_RUN_ID identifica a execução (padrão: data atual); o estado de uma
+    # execução concluída ou com falha só é refeito com outro ID ou --reset-shards
+
+    # Pushdown de filtros e projeção para a API
+    QUERY_PUSHDOWN_ENABLED = os.getenv("QUERY_PUSHDOWN_ENABLED", "true").lower() == "true"
+    # Operadores que a API aceita como query params (sufixos estilo json-server)
+    API_FILTER_OPERATORS = {"==": "", "!=": "_ne", "<=": "_lte", ">=": "_gte"}
+    # Nome do parâmetro de projeção de campos (None se a API não suporta)
+    API_PROJECTION_PARAM = None
+
+    # Estatísticas em streaming (resumo)
+    SUMMARY_CHUNK_SIZE = 10000
+    SUMMARY_HLL_PRECISION = 12
+    SUMMARY_QUANTILE_K = 200
+    SUMMARY_QUANTILES = [0.25, 0.5, 0.75, 0.95]
+    SUMMARY_TOPK = 10
+    SUMMARY_TOPK_CAPACITY = 100
+    SUMMARY_STATE_FILENAME = "summary_state.json"
+    SUMMARY_MERGE_PREVIOUS = os.getenv("SUMMARY_MERGE_PREVIOUS", "false").lower() == "true"
+
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -58,6 +140,17 @@ class Settings:
         
         return True
     
+    @classmethod
+    def get_shard_run_id(cls):
+        """Retorna o identificador da execução compartilhado entre shards"""
+        return os.getenv("SHARD_RUN_ID") or datetime.now().strftime("%Y-%m-%d")
+    
+    @classmethod
+    def get_shard_filename(cls, filename, shard_id):
+        """Retorna o nome do arquivo parcial de um shard"""
+        base, ext = os.path.splitext(filename)
+        return f"{base}.shard-{shard_id}{ext}"
+    
     @classmethod
     def get_api_url(cls):
         """Retorna URL completa da API"""
@@ -2,10 +2,17 @@
 Cliente para comunicação com APIs externas
 """
 
+import hashlib
+import os
+import threading
 import requests
-from typing import Optional, Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Any, Tuple
+from urllib.parse import urlparse
 from config.settings import settings
 from utils.logger import setup_logger
+from utils.rate_limiter import TokenBucket, get_rate_limiter
+from services.query_plan import QueryPlan
 
 logger = setup_logger(__name__)
 
@@ -16,32 +23,183 @@ class APIClient:
     def __init__(self):
         self.base_url = settings.API_BASE_URL
         self.timeout = settings.API_TIMEOUT
-        self.session = requests.Session()
         
-        # Configuração de headers
-        self.session.headers.update({
-            "Content-Type": "application/json",
-            "User-Agent": "DataCollector/2.0"
-        })
+        # requests.Session não é thread-safe: uma sessão por thread
+        self._local = threading.local()
+        self._sessions: Dict[int, requests.Session] = {}
+        self._sessions_lock = threading.Lock()
+        self.session = self._get_session()
+        
+        self.rate_limiter = self._build_rate_limiter()
+        
+        # (página, hash do corpo) da última página coletada
+        self._last_page: Optional[Tuple[int, bytes]] = None
+    
+    def _get_session(self) -> requests.Session:
+        """Retorna a sessão HTTP da thread atual"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            
+            # Configuração de headers
+            session.headers.update({
+                "Content-Type": "application/json",
+                "User-Agent": "DataCollector/2.0"
+            })
+            
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions[threading.get_ident()] = session
+        return session
+    
+    def _close_worker_sessions(self):
+        """Fecha as sessões das threads de trabalho (mantém a da thread principal)"""
+        with self._sessions_lock:
+            for ident, session in list(self._sessions.items()):
+                if session is not self.session:
+                    session.close()
+                    del self._sessions[ident]
     
-    def fetch_users(self) -> Optional[List[Dict[str, Any]]]:
+    def _build_rate_limiter(self) -> Optional[TokenBucket]:
+        """Cria (ou reutiliza) o limitador de taxa da API configurada"""
+        if not settings.RATE_LIMIT_ENABLED:
+            return None
+        
+        path = None
+        if settings.RATE_LIMIT_SHARED:
+            path = os.path.join(settings.OUTPUT_DIR, settings.RATE_LIMIT_FILENAME)
+        
+        return get_rate_limiter(
+            name=urlparse(self.base_url).netloc or self.base_url,
+            rate=settings.RATE_LIMIT_PER_SECOND * settings.RATE_LIMIT_SAFETY_FACTOR,
+            capacity=settings.RATE_LIMIT_BURST,
+            path=path
+        )
+    
+    def _get(self, url: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+        """
+        Executa um GET respeitando o rate limit
+        
+        Respostas 429 ajustam o limitador (Retry-After/X-RateLimit-*) e a
+        requisição é repetida até RATE_LIMIT_MAX_RETRIES vezes.
+        
+        Args:
+            url: URL completa
+            params: Query params (opcional)
+            
+        Returns:
+            Resposta da última tentativa
+        """
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            
+            response = self._get_session().get(url, params=params, timeout=self.timeout)
+            
+            if self.rate_limiter is None:
+                return response
+            
+            self.rate_limiter.observe(response.status_code, response.headers)
+            
+            if response.status_code != 429 or attempt >= settings.RATE_LIMIT_MAX_RETRIES:
+                return response
+            
+            attempt += 1
+            logger.warning(f"⚠ 429 em {url}, nova tentativa {attempt}/{settings.RATE_LIMIT_MAX_RETRIES}")
+    
+    def fetch_users(self, plan: Optional[QueryPlan] = None) -> Optional[List[Dict[str, Any]]]:
         """
         Busca lista de usuários da API
         
+        Se um plano de consulta for informado, ele é aplicado durante o
+        parsing da resposta; com QUERY_PUSHDOWN_ENABLED, os filtros
+        suportados também são enviados como query params. Com API_PAGE_SIZE
+        configurado, todas as páginas são buscadas em sequência.
+        
+        Args:
+            plan: Plano de consulta com filtros e colunas (opcional)
+        
         Returns:
             Lista de usuários ou None em caso de erro
         """
+        if settings.API_PAGE_SIZE is None:
+            result = self.fetch_users_page(plan)
+            return result[0] if result is not None else None
+        
+        data = []
+        page = 1
+        while True:
+            result = self.fetch_users_page(plan, page)
+            if result is None:
+                return None
+            
+            records, last_page = result
+            data.extend(records)
+            if last_page:
+                logger.info(f"✓ Dados coletados: {len(data)} registros em {page} páginas")
+                return data
+            page += 1
+    
+    def fetch_users_page(self, plan: Optional[QueryPlan] = None,
+                         page: Optional[int] = None) -> Optional[Tuple[List[Dict[str, Any]], bool]]:
+        """
+        Busca uma página de usuários da API
+        
+        A última página é a que traz menos de API_PAGE_SIZE elementos
+        (contados antes dos filtros locais). Se a API ignorar a paginação
+        (página maior que o limite ou idêntica à anterior), a coleta também
+        termina, sem duplicar registros.
+        
+        Args:
+            plan: Plano de consulta com filtros e colunas (opcional)
+            page: Número da página (None busca tudo em uma requisição)
+        
+        Returns:
+            Tupla (usuários, é_última_página) ou None em caso de erro
+        """
         url = settings.get_api_url()
         
+        # Sem pushdown o plano continua valendo localmente (ex.: faixa do shard)
+        pushdown = plan is not None and settings.QUERY_PUSHDOWN_ENABLED
+        params = plan.to_query_params() if pushdown else {}
+        if page is not None:
+            params[settings.API_PAGE_PARAM] = page
+            params[settings.API_LIMIT_PARAM] = settings.API_PAGE_SIZE
+        
         try:
-            logger.info(f"Buscando dados da API: {url}")
-            response = self.session.get(url, timeout=self.timeout)
+            if page is None or page == 1:
+                logger.info(f"Buscando dados da API: {url}")
+                if pushdown:
+                    logger.info(f"Pushdown: {plan.describe()} params={params}")
+            response = self._get(url, params=params or None)
             
             # Verifica status code
             if response.status_code == 200:
-                data = response.json()
-                logger.info(f"✓ Dados coletados: {len(data)} registros")
-                return data
+                if plan is not None:
+                    data, total = plan.parse_records(response.text)
+                else:
+                    data = response.json()
+                    total = len(data)
+                
+                if page is None:
+                    logger.info(f"✓ Dados coletados: {len(data)} registros")
+                    return data, True
+                
+                logger.debug(f"Página {page}: {len(data)} de {total} registros")
+                
+                digest = hashlib.blake2b(response.content, digest_size=16).digest()
+                previous, self._last_page = self._last_page, (page, digest)
+                
+                if total and previous == (page - 1, digest):
+                    logger.warning(f"⚠ Página {page} repete a anterior; API ignora {settings.API_PAGE_PARAM}")
+                    return [], True
+                
+                if total > settings.API_PAGE_SIZE:
+                    logger.warning(f"⚠ Página {page} com {total} registros; API ignora {settings.API_LIMIT_PARAM}")
+                    return (data if page == 1 else []), True
+                
+                return data, total < settings.API_PAGE_SIZE
             else:
                 logger.error(f"Erro na API: Status {response.status_code}")
                 logger.error(f"Response: {response.text}")
@@ -63,6 +221,87 @@ class APIClient:
             logger.error(f"Erro ao parsear JSON: {e}")
             return None
     
+    def fetch_related(self, plan: Optional[QueryPlan] = None,
+                      endpoints: Optional[Dict[str, str]] = None) -> Dict[str, Optional[List[Dict[str, Any]]]]:
+        """
+        Busca em paralelo os recursos relacionados aos usuários
+        
+        Substitui chamadas por usuário (N+1) por uma requisição por
+        endpoint; a junção com os usuários é feita pelo DataProcessor.
+        
+        Args:
+            plan: Plano de consulta dos usuários (filtros são repassados
+                  aos recursos pela chave estrangeira)
+            endpoints: Mapa nome -> endpoint (padrão: API_RELATED_ENDPOINTS)
+            
+        Returns:
+            Mapa nome -> lista de itens (None para endpoints com falha)
+        """
+        if endpoints is None:
+            endpoints = settings.API_RELATED_ENDPOINTS
+        
+        if not endpoints:
+            return {}
+        
+        related_plan = None
+        if plan is not None:
+            related_plan = plan.for_related(settings.API_RELATED_FOREIGN_KEY)
+        
+        max_workers = min(settings.API_MAX_WORKERS, len(endpoints))
+        logger.info(f"Buscando {len(endpoints)} endpoints relacionados ({max_workers} em paralelo)")
+        
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    name: executor.submit(self._fetch_endpoint, name, endpoint, related_plan)
+                    for name, endpoint in endpoints.items()
+                }
+                return {name: future.result() for name, future in futures.items()}
+        finally:
+            self._close_worker_sessions()
+    
+    def _fetch_endpoint(self, name: str, endpoint: str,
+                        plan: Optional[QueryPlan] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Busca um endpoint que retorna lista de itens
+        
+        Args:
+            name: Nome do recurso (para logs)
+            endpoint: Caminho relativo à URL base
+            plan: Plano de consulta aplicado ao recurso (opcional)
+            
+        Returns:
+            Lista de itens ou None em caso de erro
+        """
+        url = f"{self.base_url}{endpoint}"
+        params = None
+        if plan is not None and settings.QUERY_PUSHDOWN_ENABLED:
+            params = plan.to_query_params() or None
+        
+        try:
+            logger.debug(f"Buscando {name}: {url} params={params}")
+            response = self._get(url, params=params)
+            
+            if response.status_code != 200:
+                logger.warning(f"Erro ao buscar {name}: Status {response.status_code}")
+                return None
+            
+            if plan is not None:
+                data = list(plan.iter_records(response.text))
+            else:
+                data = response.json()
+            
+            logger.info(f"✓ {name}: {len(data)} registros")
+            return data
+            
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Erro ao buscar {name}: {e}")
+            return None
+            
+        except ValueError as e:
+            logger.warning(f"Erro ao parsear JSON de {name}: {e}")
+            return None
+    
     def fetch_user_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
         """
         Busca um usuário específico por ID
@@ -77,7 +316,7 @@ class APIClient:
         
         try:
             logger.debug(f"Buscando usuário ID {user_id}")
-            response = self.session.get(url, timeout=self.timeout)
+            response = self._get(url)
             
             if response.status_code == 200:
                 return response.json()
@@ -90,7 +329,8 @@ class APIClient:
             return None
     
     def __del__(self):
-        """Fecha a sessão ao destruir o objeto"""
-        if hasattr(self, 'session'):
-            self.session.close()
+        """Fecha as sessões ao destruir o objeto"""
+        if hasattr(self, '_sessions'):
+            for session in self._sessions.values():
+                session.close()
 
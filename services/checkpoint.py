@@ -0,0 +1,216 @@
+"""
+Checkpoints da coleta para retomar execuções interrompidas
+"""
+
+import json
+import os
+import shutil
+import time
+from typing import Any, Dict, List, Optional
+from config.settings import settings
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class CheckpointManager:
+    """
+    Persiste o progresso da coleta em OUTPUT_DIR/CHECKPOINT_DIRNAME
+
+    Os usuários coletados são acrescentados a um arquivo JSONL e o estado
+    (próxima página, offset em bytes, endpoints relacionados concluídos) é
+    gravado atomicamente depois dos dados. Ao retomar, bytes além do offset
+    registrado são descartados, então o checkpoint é sempre consistente.
+    """
+
+    STATE_FILENAME = "estado.json"
+    RECORDS_FILENAME = "usuarios.jsonl"
+
+    def __init__(self, fingerprint: str, resume: bool = False):
+        self.fingerprint = fingerprint
+        self.directory = os.path.join(settings.OUTPUT_DIR, settings.CHECKPOINT_DIRNAME)
+        self.state_path = os.path.join(self.directory, self.STATE_FILENAME)
+        self.records_path = os.path.join(self.directory, self.RECORDS_FILENAME)
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._pages_pending = 0
+        self.writes = 0
+        self.write_seconds = 0.0
+
+        self.state = self._load() if resume else None
+
+        if self.state is None:
+            self.clear()
+            self.state = self._new_state()
+            os.makedirs(self.directory, exist_ok=True)
+        else:
+            self._truncate_records()
+            logger.info(
+                f"Checkpoint retomado: {self.state['registros']} registros, "
+                f"próxima página {self.state['proxima_pagina']}, "
+                f"relacionados {self.state['relacionados']}"
+            )
+
+    def _new_state(self) -> Dict[str, Any]:
+        """Cria o estado inicial de uma coleta"""
+        return {
+            "fingerprint": self.fingerprint,
+            "proxima_pagina": 1,
+            "registros": 0,
+            "offset": 0,
+            "coleta_concluida": False,
+            "relacionados": [],
+            "atualizado": None
+        }
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        """Carrega o estado salvo, se compatível com esta execução"""
+        if not os.path.exists(self.state_path):
+            logger.info("Nenhum checkpoint encontrado, iniciando do zero")
+            return None
+
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠ Checkpoint inválido ignorado: {e}")
+            return None
+
+        if state.get("fingerprint") != self.fingerprint:
+            logger.warning("⚠ Checkpoint de outra configuração ignorado")
+            return None
+
+        return state
+
+    def _truncate_records(self):
+        """Descarta dados gravados após o último checkpoint consistente"""
+        if os.path.exists(self.records_path):
+            with open(self.records_path, 'r+b') as f:
+                f.truncate(self.state["offset"])
+
+    def _write_state(self):
+        """Grava o estado atomicamente"""
+        self.state["atualizado"] = time.time()
+        tmp_path = f"{self.state_path}.tmp"
+
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+
+    @property
+    def next_page(self) -> int:
+        """Próxima página a ser coletada"""
+        return self.state["proxima_pagina"]
+
+    @property
+    def collection_done(self) -> bool:
+        """Indica se a coleta de usuários foi concluída"""
+        return self.state["coleta_concluida"]
+
+    def add_page(self, page: int, records: List[Dict[str, Any]], last_page: bool):
+        """
+        Registra uma página coletada
+
+        O checkpoint é gravado a cada CHECKPOINT_EVERY_PAGES páginas e ao
+        fim da coleta.
+
+        Args:
+            page: Número da página
+            records: Registros da página
+            last_page: Se é a última página
+        """
+        self._buffer.extend(records)
+        self._pages_pending += 1
+        self.state["proxima_pagina"] = page + 1
+        self.state["coleta_concluida"] = last_page
+
+        if last_page or self._pages_pending >= settings.CHECKPOINT_EVERY_PAGES:
+            self.flush()
+
+    def flush(self):
+        """Grava os registros pendentes e o estado"""
+        if not self._pages_pending:
+            return
+
+        start = time.perf_counter()
+
+        with open(self.records_path, 'a', encoding='utf-8') as f:
+            for record in self._buffer:
+                f.write(json.dumps(record, ensure_ascii=False))
+                f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+            offset = f.tell()
+
+        self.state["registros"] += len(self._buffer)
+        self.state["offset"] = offset
+        self._write_state()
+
+        self._buffer = []
+        self._pages_pending = 0
+        self.writes += 1
+        self.write_seconds += time.perf_counter() - start
+
+        logger.debug(f"Checkpoint: {self.state['registros']} registros, página {self.state['proxima_pagina']}")
+
+    def load_records(self) -> List[Dict[str, Any]]:
+        """Carrega os usuários coletados até o último checkpoint"""
+        if not os.path.exists(self.records_path):
+            return []
+
+        with open(self.records_path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def _related_path(self, name: str) -> str:
+        """Caminho do arquivo parcial de um endpoint relacionado"""
+        return os.path.join(self.directory, f"relacionado_{name}.json")
+
+    def pending_related(self, endpoints: Dict[str, str]) -> Dict[str, str]:
+        """Retorna os endpoints relacionados ainda não coletados"""
+        return {name: endpoint for name, endpoint in endpoints.items() if name not in self.state["relacionados"]}
+
+    def save_related(self, name: str, items: List[Dict[str, Any]]):
+        """
+        Grava os itens de um endpoint relacionado concluído
+
+        Args:
+            name: Nome do recurso
+            items: Itens coletados
+        """
+        start = time.perf_counter()
+
+        with open(self._related_path(name), 'w', encoding='utf-8') as f:
+            json.dump(items, f, ensure_ascii=False)
+        self.state["relacionados"].append(name)
+        self._write_state()
+
+        self.writes += 1
+        self.write_seconds += time.perf_counter() - start
+
+    def load_related(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Carrega os endpoints relacionados já coletados"""
+        related = {}
+        for name in self.state["relacionados"]:
+            with open(self._related_path(name), 'r', encoding='utf-8') as f:
+                related[name] = json.load(f)
+        return related
+
+    def report(self, elapsed_seconds: float):
+        """
+        Registra no log o custo de I/O dos checkpoints
+
+        Args:
+            elapsed_seconds: Duração total da coleta
+        """
+        share = (self.write_seconds / elapsed_seconds * 100) if elapsed_seconds > 0 else 0.0
+        logger.info(
+            f"Checkpoints: {self.writes} gravações, {self.write_seconds * 1000:.1f} ms "
+            f"({share:.2f}% de {elapsed_seconds:.2f}s de coleta)"
+        )
+
+    def clear(self):
+        """Remove o checkpoint (após execução concluída)"""
+        if os.path.exists(self.directory):
+            shutil.rmtree(self.directory, ignore_errors=True)
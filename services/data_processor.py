@@ -8,6 +8,9 @@ from datetime import datetime
 from config.settings import settings
 from utils.logger import setup_logger
 from utils.validators import DataValidator
+from services.stream_aggregator import StreamingAggregator
+from services.query_plan import QueryPlan
+from services.deduplicator import Deduplicator
 
 logger = setup_logger(__name__)
 
@@ -17,16 +20,43 @@ class DataProcessor:
     
     def __init__(self):
         self.validator = DataValidator()
+        self.query_plan = QueryPlan.from_settings()
+        self.deduplicator = Deduplicator() if settings.DEDUP_ENABLED else None
     
-    def process_users(self, users: List[Dict[str, Any]]) -> Optional[pd.DataFrame]:
+    def build_query_plan(self) -> QueryPlan:
+        """
+        Monta o plano de consulta com os filtros e colunas usados aqui
+        
+        O mesmo plano é aplicado por `_apply_filters` e repassado ao
+        APIClient, para que registros e campos descartados aqui nem
+        cheguem a ser validados.
+        
+        Returns:
+            Plano de consulta
+        """
+        return self.query_plan
+    
+    def process_users(self, users: List[Dict[str, Any]],
+                      related: Optional[Dict[str, Optional[List[Dict[str, Any]]]]] = None,
+                      aggregator: Optional[StreamingAggregator] = None,
+                      plan: Optional[QueryPlan] = None) -> Optional[pd.DataFrame]:
         """
         Processa lista de usuários e retorna DataFrame filtrado
         
+        Os registros são processados em lotes de SUMMARY_CHUNK_SIZE; cada
+        lote pronto atualiza o agregador do resumo, que assim não precisa
+        percorrer o DataFrame final.
+        
         Args:
             users: Lista de usuários da API
+            related: Recursos relacionados por nome (opcional)
+            aggregator: Agregador do resumo atualizado a cada lote (opcional)
+            plan: Plano de consulta aplicado nos filtros (padrão: o de
+                  `build_query_plan`; shards informam o plano com sua faixa)
             
         Returns:
-            DataFrame com dados processados ou None
+            DataFrame com dados processados (vazio se todos os usuários
+            já foram exportados antes) ou None
         """
         if not users:
             logger.error("Nenhum dado para processar")
@@ -46,41 +76,151 @@ class DataProcessor:
             logger.error("Nenhum usuário válido encontrado")
             return None
         
-        # Converte para DataFrame
-        df = pd.DataFrame(valid_users)
+        # Recurso relacionado com falha deixaria suas colunas ausentes ou
+        # vazias (e diferentes entre shards): a tentativa inteira falha
+        failed = sorted(name for name, items in (related or {}).items() if items is None)
+        if failed:
+            logger.error(f"Recursos relacionados indisponíveis: {', '.join(failed)}")
+            return None
         
         # Aplica filtros
-        df_filtered = self._apply_filters(df)
+        valid_users = self._apply_filters(valid_users, plan)
         
-        # Enriquece dados
-        df_enriched = self._enrich_data(df_filtered)
+        if not valid_users:
+            logger.error("Nenhum registro após os filtros")
+            return None
+        
+        # Remove registros repetidos; só registra chaves dos que serão exportados
+        if self.deduplicator is not None:
+            valid_users = self.deduplicator.filter(valid_users)
+            
+            if not valid_users:
+                logger.warning("⚠ Nenhum usuário novo após deduplicação")
+                return pd.DataFrame()
+        
+        # Agrega recursos relacionados uma única vez para todos os lotes
+        related_aggregated = self._aggregate_related(related) if related else {}
+        
+        batches = []
+        for start in range(0, len(valid_users), settings.SUMMARY_CHUNK_SIZE):
+            # Converte para DataFrame
+            df_filtered = pd.DataFrame(valid_users[start:start + settings.SUMMARY_CHUNK_SIZE])
+            
+            # Une recursos relacionados
+            df_filtered = self._join_related(df_filtered, related_aggregated)
+            
+            # Enriquece dados
+            df_batch = self._enrich_data(df_filtered)
+            
+            if aggregator is not None:
+                aggregator.update(df_batch)
+            batches.append(df_batch)
+        
+        df_enriched = pd.concat(batches, ignore_index=True)
         
         logger.info(f"✓ Processamento concluído: {len(df_enriched)} registros")
         
         return df_enriched
     
-    def _apply_filters(self, df: pd.DataFrame) -> pd.DataFrame:
+    def commit_dedup(self):
+        """Confirma as chaves de deduplicação após a exportação dos dados"""
+        if self.deduplicator is not None:
+            self.deduplicator.commit()
+    
+    def rollback_dedup(self):
+        """Descarta as chaves de deduplicação de uma tentativa que falhou"""
+        if self.deduplicator is not None:
+            self.deduplicator.rollback()
+    
+    def close(self):
+        """Libera o armazenamento de deduplicação (fim da execução)"""
+        if self.deduplicator is not None:
+            self.deduplicator.close()
+    
+    def _apply_filters(self, users: List[Dict[str, Any]],
+                       plan: Optional[QueryPlan] = None) -> List[Dict[str, Any]]:
         """
         Aplica filtros nos dados
         
+        Usa o mesmo plano de consulta enviado à API (`build_query_plan`),
+        então filtros e colunas são definidos em um único lugar.
+        
+        Args:
+            users: Lista de usuários válidos
+            plan: Plano a aplicar (padrão: `build_query_plan`)
+            
+        Returns:
+            Usuários filtrados, apenas com as colunas relevantes
+        """
+        plan = plan or self.query_plan
+        logger.debug(f"Aplicando filtros: {plan.describe()}")
+        
+        filtered = [plan.project(user) for user in users if plan.matches(user)]
+        
+        logger.debug(f"Filtros aplicados: {len(filtered)} registros mantidos")
+        
+        return filtered
+    
+    def _aggregate_related(self, related: Dict[str, List[Dict[str, Any]]]) -> Dict[str, pd.DataFrame]:
+        """
+        Agrega cada recurso relacionado por chave estrangeira (group-by)
+        
         Args:
-            df: DataFrame original
+            related: Itens de cada recurso por nome
             
         Returns:
-            DataFrame filtrado
+            DataFrame agregado (indexado pela chave estrangeira) por nome
         """
-        logger.debug(f"Aplicando filtros (Top {settings.FILTER_TOP_N})")
+        foreign_key = settings.API_RELATED_FOREIGN_KEY
+        aggregated = {}
+        
+        for name, items in related.items():
+            aggregations = settings.RELATED_AGGREGATIONS.get(name)
+            
+            if not aggregations:
+                logger.debug(f"Sem agregações configuradas para {name}")
+                continue
+            
+            df_related = pd.DataFrame(items)
+            
+            missing = {foreign_key} | {source for source, _ in aggregations.values()}
+            missing -= set(df_related.columns)
+            if not df_related.empty and missing:
+                logger.warning(f"⚠ {name} sem campos {sorted(missing)}")
+
+            if df_related.empty or missing:
+                df_aggregated = pd.DataFrame(columns=list(aggregations))
+            else:
+                df_aggregated = df_related.groupby(foreign_key).agg(**aggregations)
+            
+            aggregated[name] = df_aggregated
+            logger.debug(f"{name} agregado: {len(df_related)} itens → {list(aggregations)}")
         
-        # Filtra os N primeiros registros por ID
-        df_filtered = df[df['id'] <= settings.FILTER_TOP_N].copy()
+        return aggregated
+    
+    def _join_related(self, df: pd.DataFrame, aggregated: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """
+        Une aos usuários as agregações dos recursos relacionados
         
-        # Seleciona apenas colunas relevantes
-        columns_to_keep = [col for col in settings.REQUIRED_FIELDS if col in df_filtered.columns]
-        df_filtered = df_filtered[columns_to_keep]
+        A união é feita por hash join com o resultado de `_aggregate_related`,
+        em vez de uma consulta por usuário.
         
-        logger.debug(f"Filtros aplicados: {len(df_filtered)} registros mantidos")
+        Args:
+            df: DataFrame de usuários
+            aggregated: Agregações de cada recurso por nome
+            
+        Returns:
+            DataFrame com as colunas agregadas
+        """
+        for name, df_aggregated in aggregated.items():
+            df = df.merge(df_aggregated, how='left', left_on='id', right_index=True)
+            
+            # Usuários sem itens relacionados têm contagem zero
+            for column, (_, func) in settings.RELATED_AGGREGATIONS[name].items():
+                if func in ('count', 'size', 'sum', 'nunique'):
+                    df[column] = df[column].fillna(0).astype(int)
         
-        return df_filtered
+        return df
     
     def _enrich_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -122,28 +262,75 @@ class DataProcessor:
         
         return True
     
-    def generate_summary(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def generate_summary(self, aggregator: StreamingAggregator,
+                         previous: Optional[StreamingAggregator] = None) -> Dict[str, Any]:
         """
         Gera resumo estatístico dos dados processados
-        
+
+        O agregador já foi alimentado lote a lote por `process_users`, então
+        o resumo não depende do DataFrame completo. Se o estado de execuções
+        anteriores for informado, ele é mesclado no lugar e todo o resumo
+        (totais e estatísticas) passa a refletir o acumulado; os registros
+        desta execução ficam em `novos_registros`.
+
         Args:
-            df: DataFrame processado
-            
+            aggregator: Agregador desta execução
+            previous: Agregador de execuções anteriores (opcional)
+
         Returns:
             Dicionário com estatísticas
         """
+        estatisticas = aggregator
+        if previous is not None:
+            previous.merge(aggregator)
+            estatisticas = previous
 
-        valid_count = df['validado'].sum() if 'validado' in df.columns else 0
-
         summary = {
-            "total_registros": len(df),
-            "colunas": list(df.columns),
-            "registros_validos": int(valid_count),
+            "total_registros": estatisticas.total_registros,
+            "novos_registros": aggregator.total_registros,
+            "colunas": list(estatisticas.colunas),
+            "registros_validos": estatisticas.registros_validos,
+            "data_processamento": datetime.now().isoformat(),
+            "ambiente": settings.APP_ENV,
+            "estatisticas": estatisticas.result()
+        }
+        
+        logger.info(
+            f"Resumo gerado: {summary['total_registros']} registros "
+            f"({summary['novos_registros']} novos)"
+        )
+        
+        return summary
+    
+    def merge_summaries(self, summaries: List[Dict[str, Any]],
+                        aggregator: StreamingAggregator) -> Dict[str, Any]:
+        """
+        Combina resumos parciais (por shard) em um resumo único
+        
+        Os totais vêm do agregador (que pode incluir execuções anteriores),
+        como em `generate_summary`.
+        
+        Args:
+            summaries: Resumos gerados por `generate_summary`
+            aggregator: Agregador com os estados parciais já mesclados
+            
+        Returns:
+            Dicionário com estatísticas combinadas
+        """
+        summary = {
+            "total_registros": aggregator.total_registros,
+            "novos_registros": sum(
+                partial.get("novos_registros", partial.get("total_registros", 0)) for partial in summaries
+            ),
+            "colunas": list(aggregator.colunas),
+            "registros_validos": aggregator.registros_validos,
             "data_processamento": datetime.now().isoformat(),
-            "ambiente": settings.APP_ENV
+            "ambiente": settings.APP_ENV,
+            "shards": len(summaries),
+            "estatisticas": aggregator.result()
         }
         
-        logger.info(f"Resumo gerado: {summary['total_registros']} registros")
+        logger.info(f"Resumos combinados: {len(summaries)} shards, {summary['total_registros']} registros")
         
         return summary
 
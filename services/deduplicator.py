@@ -0,0 +1,208 @@
+"""
+Deduplicação de registros dentro e entre execuções
+"""
+
+import os
+import sqlite3
+import tempfile
+from typing import Any, Dict, List, Optional
+from config.settings import settings
+from utils.logger import setup_logger
+from utils.sketches import BloomFilter
+
+logger = setup_logger(__name__)
+
+
+class Deduplicator:
+    """
+    Remove registros repetidos pelas chaves configuradas
+
+    Um Bloom filter em memória responde rapidamente às chaves nunca vistas;
+    apenas os possíveis repetidos são confirmados no armazenamento SQLite.
+    As chaves novas ficam pendentes em um arquivo temporário em OUTPUT_DIR
+    (removido por `close`) e só vão para o armazenamento em `commit`, numa
+    transação curta; `rollback` as descarta. A memória fica limitada ao
+    Bloom filter (DEDUP_EXPECTED_ITEMS e DEDUP_FALSE_POSITIVE_RATE) e ao
+    cache de páginas do SQLite, não ao número de chaves.
+
+    Com DEDUP_ACROSS_RUNS o armazenamento fica em OUTPUT_DIR e as chaves
+    gravadas com `commit` valem para as próximas execuções. Como outras
+    instâncias podem gravar nele a qualquer momento, o Bloom filter local
+    não basta para afirmar que uma chave é nova e o armazenamento é sempre
+    consultado. Nenhum lock de escrita é mantido durante o processamento:
+    se duas instâncias exportarem a mesma chave ao mesmo tempo, a segunda
+    a gravar apenas registra o conflito no log. Sem DEDUP_ACROSS_RUNS o
+    próprio arquivo temporário é o armazenamento.
+    """
+
+    def __init__(self, keys: Optional[List[str]] = None, across_runs: Optional[bool] = None):
+        self.keys = list(keys or settings.DEDUP_KEYS)
+        self.across_runs = settings.DEDUP_ACROSS_RUNS if across_runs is None else across_runs
+        self.staging_path = self._create_staging_file()
+
+        # Autocommit: transações só em `commit`, sem lock de escrita durante o processamento
+        self.conn = sqlite3.connect(self.staging_path, timeout=60, isolation_level=None)
+        self.conn.execute("CREATE TABLE pendentes (chave TEXT PRIMARY KEY)")
+
+        # Armazenamento compartilhado: outras instâncias/execuções gravam nele
+        self.shared = self.across_runs
+        if self.shared:
+            self.store_path = os.path.join(settings.OUTPUT_DIR, settings.DEDUP_STORE_FILENAME)
+            self.conn.execute("ATTACH DATABASE ? AS armazenamento", (self.store_path,))
+            self.table = "armazenamento.chaves"
+        else:
+            self.store_path = self.staging_path
+            self.table = "main.chaves"
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (chave TEXT PRIMARY KEY)")
+
+        self.bloom = self._load_bloom()
+        self.falsos_positivos = 0
+
+    @staticmethod
+    def _create_staging_file() -> str:
+        """Cria o arquivo temporário das chaves pendentes em OUTPUT_DIR"""
+        os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix="dedup_", suffix=".sqlite3", dir=settings.OUTPUT_DIR)
+        os.close(fd)
+        return path
+
+    def _load_bloom(self) -> BloomFilter:
+        """Cria o Bloom filter com as chaves já persistidas"""
+        stored = self.conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+        if stored > settings.DEDUP_EXPECTED_ITEMS:
+            logger.warning(
+                f"Chaves armazenadas ({stored}) excedem DEDUP_EXPECTED_ITEMS "
+                f"({settings.DEDUP_EXPECTED_ITEMS}); filtro redimensionado"
+            )
+
+        bloom = BloomFilter(
+            max(settings.DEDUP_EXPECTED_ITEMS, stored * 2),
+            settings.DEDUP_FALSE_POSITIVE_RATE
+        )
+        for (chave,) in self.conn.execute(f"SELECT chave FROM {self.table}"):
+            bloom.add(chave)
+
+        if stored:
+            logger.info(f"Chaves de execuções anteriores carregadas: {stored}")
+
+        return bloom
+
+    def _record_keys(self, record: Dict[str, Any]) -> List[str]:
+        """Monta as chaves normalizadas de um registro"""
+        chaves = []
+        for field in self.keys:
+            value = record.get(field)
+            if value is None:
+                continue
+            if isinstance(value, str):
+                value = value.strip().lower()
+            chaves.append(f"{field}={value}")
+        return chaves
+
+    def _seen(self, chave: str) -> bool:
+        """Verifica se a chave já foi vista (nesta ou em execuções anteriores)"""
+        in_bloom = chave in self.bloom
+        if not in_bloom and not self.shared:
+            return False
+
+        found = self.conn.execute(
+            f"SELECT 1 FROM pendentes WHERE chave = ? UNION ALL SELECT 1 FROM {self.table} WHERE chave = ?",
+            (chave, chave)
+        ).fetchone()
+        if found is None:
+            if in_bloom:
+                self.falsos_positivos += 1
+            return False
+        return True
+
+    def is_duplicate(self, record: Dict[str, Any]) -> bool:
+        """
+        Verifica se o registro é repetido e, se não for, registra suas chaves
+
+        Um registro é considerado repetido se qualquer uma das chaves
+        configuradas já tiver sido vista.
+
+        Args:
+            record: Registro a ser verificado
+
+        Returns:
+            True se o registro for repetido
+        """
+        chaves = self._record_keys(record)
+
+        if any(self._seen(chave) for chave in chaves):
+            return True
+
+        self.conn.executemany("INSERT OR IGNORE INTO pendentes (chave) VALUES (?)", [(c,) for c in chaves])
+        for chave in chaves:
+            self.bloom.add(chave)
+        return False
+
+    def filter(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Remove registros repetidos de uma lista
+
+        Args:
+            records: Lista de registros
+
+        Returns:
+            Lista sem registros repetidos, na ordem original
+        """
+        unique = []
+        for record in records:
+            if self.is_duplicate(record):
+                logger.debug(f"Registro repetido descartado (ID: {record.get('id')})")
+            else:
+                unique.append(record)
+
+        removed = len(records) - len(unique)
+        logger.info(f"Deduplicação: {removed} repetidos removidos de {len(records)} registros")
+        if self.falsos_positivos:
+            logger.debug(f"Falsos positivos do Bloom filter: {self.falsos_positivos}")
+
+        return unique
+
+    def commit(self):
+        """Grava as chaves pendentes no armazenamento em uma transação curta"""
+        pending = self.conn.execute("SELECT COUNT(*) FROM pendentes").fetchone()[0]
+        if not pending:
+            return
+
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            inserted = self.conn.execute(
+                f"INSERT OR IGNORE INTO {self.table} (chave) SELECT chave FROM pendentes"
+            ).rowcount
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        self.conn.execute("DELETE FROM pendentes")
+
+        if inserted < pending:
+            logger.warning(
+                f"⚠ {pending - inserted} chaves já haviam sido gravadas por outra instância"
+            )
+
+    def rollback(self):
+        """Descarta as chaves registradas desde o último commit"""
+        self.conn.execute("DELETE FROM pendentes")
+        self.bloom = self._load_bloom()
+
+    def close(self):
+        """Fecha a conexão e remove o armazenamento temporário"""
+        if getattr(self, 'conn', None) is None:
+            return
+
+        self.conn.close()
+        self.conn = None
+
+        for path in (self.staging_path, f"{self.staging_path}-journal"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def __del__(self):
+        """Fecha a conexão ao destruir o objeto"""
+        self.close()
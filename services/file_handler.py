@@ -77,6 +77,50 @@ class FileHandler:
             logger.exception("Detalhes do erro:")
             return False
     
+    def load_excel(self, filename: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """
+        Carrega um arquivo Excel do diretório de saída
+        
+        Args:
+            filename: Nome do arquivo (opcional)
+            
+        Returns:
+            DataFrame ou None se o arquivo não existir/for inválido
+        """
+        filepath = os.path.join(self.output_dir, filename or settings.OUTPUT_FILENAME)
+        
+        if not os.path.exists(filepath):
+            return None
+        
+        try:
+            return pd.read_excel(filepath, engine='openpyxl')
+            
+        except Exception as e:
+            logger.error(f"Erro ao ler arquivo Excel {filepath}: {e}")
+            return None
+    
+    def remove_file(self, filename: str) -> bool:
+        """
+        Remove um arquivo do diretório de saída, se existir
+        
+        Args:
+            filename: Nome do arquivo
+            
+        Returns:
+            True se o arquivo não existe mais
+        """
+        filepath = os.path.join(self.output_dir, filename)
+        
+        try:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+                logger.debug(f"Arquivo removido: {filepath}")
+            return True
+            
+        except OSError as e:
+            logger.warning(f"Erro ao remover {filepath}: {e}")
+            return False
+    
     def save_summary(self, summary: dict, filename: str = "summary.json") -> bool:
         """
         Salva resumo em arquivo JSON
@@ -103,3 +147,82 @@ class FileHandler:
             logger.error(f"Erro ao salvar resumo: {e}")
             return False
 
+    def save_summary_state(self, state: dict, filename: Optional[str] = None) -> bool:
+        """
+        Salva o estado mesclável do agregador de estatísticas
+
+        Args:
+            state: Estado serializado (StreamingAggregator.to_state)
+            filename: Nome do arquivo JSON (opcional)
+
+        Returns:
+            True se salvou com sucesso
+        """
+        import json
+
+        filepath = os.path.join(self.output_dir, filename or settings.SUMMARY_STATE_FILENAME)
+        tmp_path = f"{filepath}.tmp"
+
+        try:
+            # Escrita atômica para não corromper o estado de execuções anteriores
+            with open(tmp_path, 'w', encoding=self.encoding) as f:
+                json.dump(state, f)
+            os.replace(tmp_path, filepath)
+
+            logger.info(f"Estado do resumo salvo em: {filepath}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Erro ao salvar estado do resumo: {e}")
+            return False
+
+    def load_summary(self, filename: str = "summary.json") -> Optional[dict]:
+        """
+        Carrega um resumo salvo com `save_summary`
+        
+        Args:
+            filename: Nome do arquivo JSON
+            
+        Returns:
+            Resumo ou None se não existir/for inválido
+        """
+        import json
+        
+        filepath = os.path.join(self.output_dir, filename)
+        
+        if not os.path.exists(filepath):
+            return None
+        
+        try:
+            with open(filepath, 'r', encoding=self.encoding) as f:
+                return json.load(f)
+                
+        except Exception as e:
+            logger.warning(f"Resumo ignorado ({filepath}): {e}")
+            return None
+
+    def load_summary_state(self, filename: Optional[str] = None) -> Optional[dict]:
+        """
+        Carrega o estado do agregador salvo em execução anterior
+
+        Args:
+            filename: Nome do arquivo JSON (opcional)
+
+        Returns:
+            Estado serializado ou None se não existir/for inválido
+        """
+        import json
+
+        filepath = os.path.join(self.output_dir, filename or settings.SUMMARY_STATE_FILENAME)
+
+        if not os.path.exists(filepath):
+            return None
+
+        try:
+            with open(filepath, 'r', encoding=self.encoding) as f:
+                return json.load(f)
+
+        except Exception as e:
+            logger.warning(f"Estado do resumo ignorado ({filepath}): {e}")
+            return None
+
@@ -0,0 +1,223 @@
+"""
+Plano de consulta com pushdown de filtros e projeção para a API
+"""
+
+import json
+import operator
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from config.settings import settings
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Operadores de comparação aceitos nos filtros
+OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+Filter = Tuple[str, str, Any]
+
+
+class QueryPlan:
+    """
+    Descreve quais registros e campos o processamento realmente usa
+
+    Os filtros suportados pela API viram query params; os demais, junto
+    com a projeção de colunas, são aplicados durante o parsing da resposta,
+    antes da validação.
+    """
+
+    def __init__(self, filters: Optional[List[Filter]] = None,
+                 columns: Optional[List[str]] = None):
+        self.filters = list(filters or [])
+        self.columns = list(columns) if columns else None
+
+        for field, op, _ in self.filters:
+            if op not in OPERATORS:
+                raise ValueError(f"Operador de filtro não suportado: {op} ({field})")
+
+    @classmethod
+    def from_settings(cls) -> "QueryPlan":
+        """Cria o plano a partir dos filtros e colunas de `settings`"""
+        return cls(filters=settings.QUERY_FILTERS, columns=settings.REQUIRED_FIELDS)
+
+    def with_filters(self, filters: List[Filter]) -> "QueryPlan":
+        """
+        Retorna uma cópia do plano com filtros adicionais
+
+        Args:
+            filters: Filtros a acrescentar (campo, operador, valor)
+
+        Returns:
+            Novo plano com a mesma projeção
+        """
+        return QueryPlan(filters=self.filters + list(filters), columns=self.columns)
+
+    def for_related(self, foreign_key: str, key: str = "id") -> "QueryPlan":
+        """
+        Deriva o plano de um recurso relacionado aos registros deste plano
+
+        Filtros sobre `key` passam a valer para `foreign_key`, de modo que
+        só são baixados os itens dos registros que serão mantidos.
+
+        Args:
+            foreign_key: Campo do recurso relacionado (ex.: userId)
+            key: Campo deste plano referenciado pela chave estrangeira
+
+        Returns:
+            Plano sem projeção, apenas com os filtros traduzidos
+        """
+        filters = [(foreign_key, op, value) for field, op, value in self.filters if field == key]
+        return QueryPlan(filters=filters)
+
+    def to_query_params(self) -> Dict[str, Any]:
+        """
+        Traduz os filtros suportados pela API em query params
+
+        Returns:
+            Dicionário de parâmetros (vazio se nada puder ser enviado)
+        """
+        params: Dict[str, Any] = {}
+
+        for field, op, value in self.filters:
+            suffix = settings.API_FILTER_OPERATORS.get(op)
+            if suffix is None:
+                continue
+
+            # Vários limites no mesmo campo: envia o mais restritivo; os
+            # demais filtros continuam sendo aplicados no parsing
+            param = f"{field}{suffix}"
+            if param in params:
+                if op == "<=":
+                    value = min(params[param], value)
+                elif op == ">=":
+                    value = max(params[param], value)
+                else:
+                    continue
+            params[param] = value
+
+        if self.columns and settings.API_PROJECTION_PARAM:
+            params[settings.API_PROJECTION_PARAM] = ",".join(self.columns)
+
+        return params
+
+    def matches(self, record: Dict[str, Any]) -> bool:
+        """
+        Verifica se um registro satisfaz todos os filtros
+
+        Registros sem o campo filtrado ou com tipo incomparável são mantidos
+        para que a validação os rejeite com a mensagem adequada.
+        """
+        for field, op, value in self.filters:
+            if field not in record:
+                continue
+            try:
+                if not OPERATORS[op](record[field], value):
+                    return False
+            except TypeError:
+                continue
+        return True
+
+    def project(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Mantém apenas as colunas do plano"""
+        if self.columns is None:
+            return record
+        return {field: record[field] for field in self.columns if field in record}
+
+    def iter_records(self, text: str) -> Iterator[Dict[str, Any]]:
+        """
+        Faz o parsing incremental de um array JSON aplicando o plano
+
+        Cada elemento é decodificado, filtrado e projetado antes do próximo,
+        então registros descartados nunca chegam a ser acumulados.
+
+        Args:
+            text: Corpo da resposta (array JSON)
+
+        Returns:
+            Iterador de registros filtrados e projetados
+
+        Raises:
+            ValueError: Se o conteúdo não for um array JSON válido
+        """
+        for record in _iter_array(text):
+            if not isinstance(record, dict):
+                yield record
+            elif self.matches(record):
+                yield self.project(record)
+
+    def parse_records(self, text: str) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Como `iter_records`, mas também conta os elementos da resposta
+
+        A contagem inclui os registros descartados pelos filtros locais e
+        serve para detectar a última página da paginação.
+
+        Args:
+            text: Corpo da resposta (array JSON)
+
+        Returns:
+            Tupla (registros filtrados e projetados, total de elementos)
+
+        Raises:
+            ValueError: Se o conteúdo não for um array JSON válido
+        """
+        records = []
+        total = 0
+        for record in _iter_array(text):
+            total += 1
+            if not isinstance(record, dict):
+                records.append(record)
+            elif self.matches(record):
+                records.append(self.project(record))
+        return records, total
+
+    def describe(self) -> str:
+        """Retorna uma descrição legível do plano para logs"""
+        filters = ", ".join(f"{field} {op} {value}" for field, op, value in self.filters)
+        columns = ", ".join(self.columns) if self.columns else "*"
+        return f"filtros=[{filters}] colunas=[{columns}]"
+
+
+def _iter_array(text: str) -> Iterator[Any]:
+    """
+    Decodifica os elementos de um array JSON um a um
+
+    Raises:
+        ValueError: Se o conteúdo não for um array JSON válido
+    """
+    decoder = json.JSONDecoder()
+    length = len(text)
+    pos = _skip_whitespace(text, 0)
+
+    if pos >= length or text[pos] != "[":
+        raise ValueError("Resposta da API não é um array JSON")
+    pos = _skip_whitespace(text, pos + 1)
+
+    if pos < length and text[pos] == "]":
+        return
+
+    while True:
+        element, pos = decoder.raw_decode(text, pos)
+        yield element
+
+        pos = _skip_whitespace(text, pos)
+        if pos >= length:
+            raise ValueError("Array JSON não terminado")
+        if text[pos] == "]":
+            return
+        if text[pos] != ",":
+            raise ValueError(f"Separador inválido na posição {pos}")
+        pos = _skip_whitespace(text, pos + 1)
+
+
+def _skip_whitespace(text: str, pos: int) -> int:
+    """Avança a posição até o próximo caractere não branco"""
+    while pos < len(text) and text[pos] in " \t\n\r":
+        pos += 1
+    return pos
@@ -0,0 +1,395 @@
+"""
+Coordenação de execução em shards entre várias instâncias
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from config.settings import settings
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+PENDENTE = "pendente"
+EM_ANDAMENTO = "em_andamento"
+CONCLUIDO = "concluido"
+FALHOU = "falhou"
+
+
+class ShardCoordinator:
+    """
+    Distribui faixas de IDs entre instâncias via leases em SQLite
+
+    O arquivo fica no volume de dados compartilhado. Cada instância reivindica
+    um shard com um lease de SHARD_LEASE_SECONDS; se a instância morrer e o
+    lease expirar, outra instância assume o shard. A etapa final de merge é
+    reivindicada da mesma forma por uma única instância. Um shard que falha
+    SHARD_MAX_ATTEMPTS vezes é marcado como falho e bloqueia o merge.
+
+    O estado de uma execução (SHARD_RUN_ID) nunca expira: para processar
+    de novo, use outro SHARD_RUN_ID ou descarte o estado com `reset`.
+    """
+
+    def __init__(self, run_id: Optional[str] = None, owner: Optional[str] = None):
+        self.run_id = run_id or settings.get_shard_run_id()
+        self.owner = owner or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = settings.SHARD_LEASE_SECONDS
+
+        os.makedirs(settings.OUTPUT_DIR, exist_ok=True)
+        self.db_path = os.path.join(settings.OUTPUT_DIR, settings.SHARD_DB_FILENAME)
+        self.conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        self._create_tables()
+
+    def _create_tables(self):
+        """Cria as tabelas de coordenação se não existirem"""
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS shards (
+                execucao TEXT NOT NULL,
+                shard_id INTEGER NOT NULL,
+                id_inicio INTEGER NOT NULL,
+                id_fim INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                dono TEXT,
+                lease_expira REAL,
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (execucao, shard_id)
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS merges (
+                execucao TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                dono TEXT,
+                lease_expira REAL
+            )
+        """)
+
+    def _transaction(self):
+        """Abre uma transação com lock de escrita imediato"""
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    @staticmethod
+    def split_ranges(id_min: int, id_max: int, count: int) -> List[Tuple[int, int]]:
+        """
+        Divide a faixa de IDs em `count` faixas contíguas
+
+        Args:
+            id_min: Primeiro ID
+            id_max: Último ID (inclusivo)
+            count: Quantidade de shards
+
+        Returns:
+            Lista de tuplas (id_inicio, id_fim)
+        """
+        total = id_max - id_min + 1
+        count = max(1, min(count, total))
+        size, remainder = divmod(total, count)
+
+        ranges = []
+        start = id_min
+        for index in range(count):
+            end = start + size - 1 + (1 if index < remainder else 0)
+            ranges.append((start, end))
+            start = end + 1
+        return ranges
+
+    def initialize(self, count: Optional[int] = None) -> int:
+        """
+        Registra os shards da execução (idempotente entre instâncias)
+
+        Args:
+            count: Quantidade de shards (padrão: SHARD_COUNT)
+
+        Returns:
+            Quantidade de shards da execução
+        """
+        count = count or settings.SHARD_COUNT
+        ranges = self.split_ranges(settings.SHARD_ID_MIN, settings.SHARD_ID_MAX, count)
+
+        self._transaction()
+        try:
+            existing = self.conn.execute(
+                "SELECT COUNT(*) FROM shards WHERE execucao = ?", (self.run_id,)
+            ).fetchone()[0]
+
+            if not existing:
+                self.conn.executemany(
+                    "INSERT INTO shards (execucao, shard_id, id_inicio, id_fim, status) VALUES (?, ?, ?, ?, ?)",
+                    [(self.run_id, shard_id, start, end, PENDENTE) for shard_id, (start, end) in enumerate(ranges)]
+                )
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO merges (execucao, status) VALUES (?, ?)",
+                    (self.run_id, PENDENTE)
+                )
+                existing = len(ranges)
+                logger.info(f"Execução {self.run_id}: {existing} shards registrados")
+
+            self.conn.execute("COMMIT")
+            return existing
+
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def reset(self) -> Optional[int]:
+        """
+        Descarta os shards e o merge da execução para que ela recomece
+
+        Recusa se algum shard ou o merge tiver lease ainda válido, isto é,
+        se houver instância processando a execução.
+
+        Returns:
+            Quantidade de shards descartados ou None se recusado
+        """
+        now = time.time()
+
+        self._transaction()
+        try:
+            active = self.conn.execute(
+                "SELECT COUNT(*) FROM shards WHERE execucao = ? AND status = ? AND lease_expira >= ?",
+                (self.run_id, EM_ANDAMENTO, now)
+            ).fetchone()[0]
+            active += self.conn.execute(
+                "SELECT COUNT(*) FROM merges WHERE execucao = ? AND status = ? AND lease_expira >= ?",
+                (self.run_id, EM_ANDAMENTO, now)
+            ).fetchone()[0]
+
+            if active:
+                self.conn.execute("COMMIT")
+                logger.error(f"✗ Execução {self.run_id} em andamento ({active} leases ativos); reset recusado")
+                return None
+
+            removed = self.conn.execute(
+                "DELETE FROM shards WHERE execucao = ?", (self.run_id,)
+            ).rowcount
+            self.conn.execute("DELETE FROM merges WHERE execucao = ?", (self.run_id,))
+            self.conn.execute("COMMIT")
+
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        logger.info(f"Execução {self.run_id}: {removed} shards descartados")
+        return removed
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """
+        Reivindica um shard pendente ou com lease expirado
+
+        Returns:
+            Dados do shard (shard_id, id_inicio, id_fim) ou None se não houver
+        """
+        now = time.time()
+
+        self._transaction()
+        try:
+            row = self.conn.execute(
+                """
+                SELECT shard_id, id_inicio, id_fim, status, dono, tentativas FROM shards
+                WHERE execucao = ?
+                  AND (status = ? OR (status = ? AND lease_expira < ?))
+                ORDER BY shard_id LIMIT 1
+                """,
+                (self.run_id, PENDENTE, EM_ANDAMENTO, now)
+            ).fetchone()
+
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+
+            shard_id, start, end, status, previous_owner, attempts = row
+
+            if attempts >= settings.SHARD_MAX_ATTEMPTS:
+                self.conn.execute(
+                    "UPDATE shards SET status = ?, lease_expira = NULL WHERE execucao = ? AND shard_id = ?",
+                    (FALHOU, self.run_id, shard_id)
+                )
+                self.conn.execute("COMMIT")
+                logger.error(f"✗ Shard {shard_id} excedeu {attempts} tentativas e foi marcado como falho")
+                return self.claim()
+
+            self.conn.execute(
+                """
+                UPDATE shards SET status = ?, dono = ?, lease_expira = ?, tentativas = tentativas + 1
+                WHERE execucao = ? AND shard_id = ?
+                """,
+                (EM_ANDAMENTO, self.owner, now + self.lease_seconds, self.run_id, shard_id)
+            )
+            self.conn.execute("COMMIT")
+
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        if status == EM_ANDAMENTO:
+            logger.warning(f"⚠ Lease expirado do shard {shard_id} ({previous_owner}) assumido")
+        logger.info(f"Shard {shard_id} reivindicado: IDs {start}-{end}")
+
+        return {"shard_id": shard_id, "id_inicio": start, "id_fim": end}
+
+    def renew(self, shard_id: int) -> bool:
+        """
+        Renova o lease de um shard deste dono
+
+        Returns:
+            True se o lease ainda pertence a esta instância
+        """
+        cursor = self.conn.execute(
+            "UPDATE shards SET lease_expira = ? WHERE execucao = ? AND shard_id = ? AND dono = ? AND status = ?",
+            (time.time() + self.lease_seconds, self.run_id, shard_id, self.owner, EM_ANDAMENTO)
+        )
+        if cursor.rowcount != 1:
+            logger.warning(f"⚠ Lease do shard {shard_id} perdido")
+            return False
+        return True
+
+    def complete(self, shard_id: int) -> bool:
+        """
+        Marca um shard deste dono como concluído
+
+        Returns:
+            True se concluído; False se o lease foi assumido por outra instância
+        """
+        cursor = self.conn.execute(
+            "UPDATE shards SET status = ?, lease_expira = NULL WHERE execucao = ? AND shard_id = ? AND dono = ? AND status = ?",
+            (CONCLUIDO, self.run_id, shard_id, self.owner, EM_ANDAMENTO)
+        )
+        if cursor.rowcount != 1:
+            logger.warning(f"⚠ Shard {shard_id} não pertence mais a esta instância")
+            return False
+
+        logger.info(f"✓ Shard {shard_id} concluído")
+        return True
+
+    def release(self, shard_id: int):
+        """Devolve um shard com falha para que outra instância o processe"""
+        self.conn.execute(
+            "UPDATE shards SET status = ?, dono = NULL, lease_expira = NULL WHERE execucao = ? AND shard_id = ? AND dono = ?",
+            (PENDENTE, self.run_id, shard_id, self.owner)
+        )
+
+    def all_done(self) -> bool:
+        """Verifica se nenhum shard da execução está pendente ou em andamento"""
+        remaining = self.conn.execute(
+            "SELECT COUNT(*) FROM shards WHERE execucao = ? AND status IN (?, ?)",
+            (self.run_id, PENDENTE, EM_ANDAMENTO)
+        ).fetchone()[0]
+        return remaining == 0
+
+    def failed_shards(self) -> List[int]:
+        """Retorna os IDs dos shards que falharam em todas as tentativas"""
+        rows = self.conn.execute(
+            "SELECT shard_id FROM shards WHERE execucao = ? AND status = ? ORDER BY shard_id",
+            (self.run_id, FALHOU)
+        ).fetchall()
+        return [shard_id for (shard_id,) in rows]
+
+    def completed_shards(self) -> List[int]:
+        """Retorna os IDs dos shards concluídos da execução"""
+        rows = self.conn.execute(
+            "SELECT shard_id FROM shards WHERE execucao = ? AND status = ? ORDER BY shard_id",
+            (self.run_id, CONCLUIDO)
+        ).fetchall()
+        return [shard_id for (shard_id,) in rows]
+
+    def claim_merge(self) -> bool:
+        """
+        Reivindica a etapa de merge (apenas uma instância a executa)
+
+        Returns:
+            True se esta instância deve executar o merge
+        """
+        now = time.time()
+        cursor = self.conn.execute(
+            """
+            UPDATE merges SET status = ?, dono = ?, lease_expira = ?
+            WHERE execucao = ?
+              AND (status = ? OR (status = ? AND lease_expira < ?))
+            """,
+            (EM_ANDAMENTO, self.owner, now + self.lease_seconds, self.run_id, PENDENTE, EM_ANDAMENTO, now)
+        )
+        return cursor.rowcount == 1
+
+    def complete_merge(self):
+        """Marca a etapa de merge como concluída"""
+        self.conn.execute(
+            "UPDATE merges SET status = ?, lease_expira = NULL WHERE execucao = ? AND dono = ?",
+            (CONCLUIDO, self.run_id, self.owner)
+        )
+
+    def release_merge(self):
+        """Devolve a etapa de merge após uma falha"""
+        self.conn.execute(
+            "UPDATE merges SET status = ?, dono = NULL, lease_expira = NULL WHERE execucao = ? AND dono = ?",
+            (PENDENTE, self.run_id, self.owner)
+        )
+
+    def merge_done(self) -> bool:
+        """Verifica se o merge da execução já foi concluído"""
+        row = self.conn.execute(
+            "SELECT status FROM merges WHERE execucao = ?", (self.run_id,)
+        ).fetchone()
+        return row is not None and row[0] == CONCLUIDO
+
+    def __del__(self):
+        """Fecha a conexão ao destruir o objeto"""
+        if hasattr(self, 'conn'):
+            self.conn.close()
+
+
+class LeaseRenewer(threading.Thread):
+    """
+    Renova em segundo plano o lease de um shard em processamento
+
+    A renovação acontece a cada terço do lease, independentemente da duração
+    das etapas do pipeline. A thread usa sua própria conexão SQLite; erros
+    transitórios (banco ocupado) são tentados de novo no próximo intervalo.
+    Se o lease for assumido por outra instância ou não puder ser renovado
+    antes de expirar, `held` passa a retornar False e o shard deve ser
+    abandonado.
+    """
+
+    def __init__(self, run_id: str, owner: str, shard_id: int,
+                 interval: Optional[float] = None):
+        super().__init__(name=f"lease-shard-{shard_id}", daemon=True)
+        self.run_id = run_id
+        self.owner = owner
+        self.shard_id = shard_id
+        self.interval = interval if interval is not None else settings.SHARD_LEASE_SECONDS / 3
+        self._stop_event = threading.Event()
+        self._lost = threading.Event()
+
+    def run(self):
+        """Renova o lease até `stop` ser chamado ou o lease ser perdido"""
+        coordinator = ShardCoordinator(self.run_id, self.owner)
+        renewed_at = time.time()
+
+        try:
+            while not self._stop_event.wait(self.interval):
+                try:
+                    if not coordinator.renew(self.shard_id):
+                        self._lost.set()
+                        return
+                    renewed_at = time.time()
+
+                except sqlite3.OperationalError as e:
+                    logger.warning(f"⚠ Falha ao renovar lease do shard {self.shard_id}: {e}")
+                    if time.time() - renewed_at >= coordinator.lease_seconds:
+                        logger.error(f"✗ Lease do shard {self.shard_id} expirou sem renovação")
+                        self._lost.set()
+                        return
+        finally:
+            coordinator.conn.close()
+
+    def held(self) -> bool:
+        """Verifica se o lease ainda pertence a esta instância"""
+        return not self._lost.is_set()
+
+    def stop(self):
+        """Interrompe a renovação e aguarda a thread terminar"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
@@ -0,0 +1,188 @@
+"""
+Agregador de estatísticas em streaming para o resumo do processamento
+"""
+
+import pandas as pd
+from typing import Any, Dict, Optional
+from config.settings import settings
+from utils.logger import setup_logger
+from utils.sketches import FrequentItems, HyperLogLog, QuantileSketch
+
+logger = setup_logger(__name__)
+
+
+class ColumnStats:
+    """Estatísticas acumuladas de uma coluna"""
+
+    def __init__(self):
+        self.nulos = 0
+        self.distintos = HyperLogLog(settings.SUMMARY_HLL_PRECISION)
+        self.quantis: Optional[QuantileSketch] = None
+
+    def update(self, values: pd.Series):
+        """
+        Atualiza as estatísticas com os valores de um chunk
+
+        Args:
+            values: Valores da coluna no chunk
+        """
+        self.nulos += int(values.isna().sum())
+        non_null = values.dropna()
+
+        for value in non_null:
+            self.distintos.add(value)
+
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            if self.quantis is None:
+                self.quantis = QuantileSketch(settings.SUMMARY_QUANTILE_K)
+            for value in non_null:
+                self.quantis.add(value)
+
+    def merge(self, other: "ColumnStats"):
+        """Mescla as estatísticas de outra coluna nesta"""
+        self.nulos += other.nulos
+        self.distintos.merge(other.distintos)
+
+        if other.quantis is not None:
+            if self.quantis is None:
+                self.quantis = QuantileSketch(other.quantis.k)
+            self.quantis.merge(other.quantis)
+
+    def result(self) -> Dict[str, Any]:
+        """Retorna as estatísticas finais da coluna"""
+        result = {
+            "nulos": self.nulos,
+            "distintos_estimados": self.distintos.count()
+        }
+
+        if self.quantis is not None and self.quantis.count:
+            result["quantis"] = {
+                f"p{int(q * 100)}": self.quantis.quantile(q)
+                for q in settings.SUMMARY_QUANTILES
+            }
+            result["min"] = self.quantis.min_value
+            result["max"] = self.quantis.max_value
+
+        return result
+
+    def to_state(self) -> Dict[str, Any]:
+        """Serializa o estado da coluna"""
+        return {
+            "nulos": self.nulos,
+            "distintos": self.distintos.to_state(),
+            "quantis": self.quantis.to_state() if self.quantis is not None else None
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "ColumnStats":
+        """Reconstrói o estado da coluna a partir de `to_state`"""
+        stats = cls()
+        stats.nulos = state["nulos"]
+        stats.distintos = HyperLogLog.from_state(state["distintos"])
+        if state.get("quantis") is not None:
+            stats.quantis = QuantileSketch.from_state(state["quantis"])
+        return stats
+
+
+class StreamingAggregator:
+    """
+    Calcula estatísticas do resumo em uma única passada sobre chunks
+
+    O estado é mesclável (`merge`) e serializável (`to_state`/`from_state`),
+    permitindo combinar resultados de vários workers ou execuções.
+    """
+
+    def __init__(self):
+        self.total_registros = 0
+        self.registros_validos = 0
+        self.colunas: Dict[str, ColumnStats] = {}
+        self.dominios_email = FrequentItems(settings.SUMMARY_TOPK_CAPACITY)
+        self.websites = FrequentItems(settings.SUMMARY_TOPK_CAPACITY)
+
+    def update(self, chunk: pd.DataFrame):
+        """
+        Atualiza o estado com um chunk de registros
+
+        Args:
+            chunk: DataFrame com parte dos registros
+        """
+        self.total_registros += len(chunk)
+        if "validado" in chunk.columns:
+            self.registros_validos += int(chunk["validado"].sum())
+
+        for column in chunk.columns:
+            if column not in self.colunas:
+                self.colunas[column] = ColumnStats()
+            self.colunas[column].update(chunk[column])
+
+        if "email" in chunk.columns:
+            emails = chunk["email"].dropna().astype(str)
+            emails = emails[emails.str.contains("@", regex=False)]
+            self.dominios_email.update(emails.str.rsplit("@", n=1).str[-1].str.lower())
+
+        if "website" in chunk.columns:
+            self.websites.update(chunk["website"].dropna().astype(str).str.lower())
+
+    def merge(self, other: "StreamingAggregator"):
+        """
+        Mescla o estado de outro agregador neste
+
+        Args:
+            other: Agregador a ser mesclado
+        """
+        self.total_registros += other.total_registros
+        self.registros_validos += other.registros_validos
+
+        for column, stats in other.colunas.items():
+            if column in self.colunas:
+                self.colunas[column].merge(stats)
+            else:
+                self.colunas[column] = stats
+
+        self.dominios_email.merge(other.dominios_email)
+        self.websites.merge(other.websites)
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Retorna as estatísticas finais
+
+        Returns:
+            Dicionário pronto para o summary.json
+        """
+        return {
+            "total_registros": self.total_registros,
+            "colunas": {column: stats.result() for column, stats in self.colunas.items()},
+            # Misra-Gries subestima as contagens: são limites inferiores
+            "top_dominios_email": [
+                {"dominio": item, "contagem_minima": count}
+                for item, count in self.dominios_email.top(settings.SUMMARY_TOPK)
+            ],
+            "top_websites": [
+                {"website": item, "contagem_minima": count}
+                for item, count in self.websites.top(settings.SUMMARY_TOPK)
+            ]
+        }
+
+    def to_state(self) -> Dict[str, Any]:
+        """Serializa o estado do agregador"""
+        return {
+            "total_registros": self.total_registros,
+            "registros_validos": self.registros_validos,
+            "colunas": {column: stats.to_state() for column, stats in self.colunas.items()},
+            "dominios_email": self.dominios_email.to_state(),
+            "websites": self.websites.to_state()
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "StreamingAggregator":
+        """Reconstrói o agregador a partir de `to_state`"""
+        aggregator = cls()
+        aggregator.total_registros = state["total_registros"]
+        aggregator.registros_validos = state.get("registros_validos", 0)
+        aggregator.colunas = {
+            column: ColumnStats.from_state(column_state)
+            for column, column_state in state["colunas"].items()
+        }
+        aggregator.dominios_email = FrequentItems.from_state(state["dominios_email"])
+        aggregator.websites = FrequentItems.from_state(state["websites"])
+        return aggregator
@@ -0,0 +1,9 @@
+"""
+Configuração comum dos testes
+"""
+
+import os
+import sys
+
+# Adiciona o diretório raiz ao path para imports funcionarem
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,141 @@
+"""
+Checkpoints da coleta e retomada com --resume
+"""
+
+import json
+import os
+import pytest
+from config.settings import Settings
+from app.main import Application
+from services.checkpoint import CheckpointManager
+
+TOTAL = 25
+PAGE_SIZE = 10
+FINGERPRINT = "teste"
+
+
+def _usuario(i):
+    return {
+        "id": i,
+        "name": f"Usuário {i}",
+        "username": f"usuario{i}",
+        "email": f"usuario{i}@exemplo.com",
+        "phone": "1-770-736-8031",
+        "website": f"site{i}.org",
+    }
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Aplicação com API paginada simulada e sem endpoints relacionados"""
+    monkeypatch.setattr(Settings, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(Settings, "API_PAGE_SIZE", PAGE_SIZE)
+    monkeypatch.setattr(Settings, "CHECKPOINT_EVERY_PAGES", 1)
+    monkeypatch.setattr(Settings, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(Settings, "API_RELATED_ENDPOINTS", {})
+    monkeypatch.setattr(Settings, "DEDUP_ACROSS_RUNS", False)
+
+    return _aplicacao(monkeypatch)
+
+
+def _aplicacao(monkeypatch, resume=False):
+    application = Application(resume=resume)
+    application.paginas = []
+    application.falhar_na_pagina = None
+    monkeypatch.setattr(application.scheduler, "pode_executar", lambda: True)
+
+    def fetch_users_page(plan=None, page=None):
+        application.paginas.append(page)
+        if page == application.falhar_na_pagina:
+            return None
+        itens = [_usuario(i) for i in range(1, TOTAL + 1)][(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+        return itens, len(itens) < PAGE_SIZE
+
+    monkeypatch.setattr(application.api_client, "fetch_users_page", fetch_users_page)
+    return application
+
+
+def _coletar(application, checkpoint):
+    return application._coletar_com_checkpoint(application.data_processor.build_query_plan(), checkpoint)
+
+
+def _interromper_na_pagina_3(application):
+    application.falhar_na_pagina = 3
+    checkpoint = CheckpointManager(FINGERPRINT)
+    assert _coletar(application, checkpoint) is None
+    application.falhar_na_pagina = None
+    application.paginas.clear()
+    return checkpoint
+
+
+def test_retomada_continua_da_pagina_interrompida(app):
+    _interromper_na_pagina_3(app)
+
+    checkpoint = CheckpointManager(FINGERPRINT, resume=True)
+    assert checkpoint.next_page == 3
+
+    dados, _ = _coletar(app, checkpoint)
+
+    assert app.paginas == [3]
+    assert [u["id"] for u in dados] == list(range(1, TOTAL + 1))
+
+
+def test_execucao_interrompida_retomada_com_resume(app, monkeypatch):
+    app.falhar_na_pagina = 3
+    assert app.executar() is False
+    app.encerrar()
+
+    retomada = _aplicacao(monkeypatch, resume=True)
+    assert retomada.executar() is True
+    retomada.encerrar()
+
+    assert retomada.paginas == [3]
+    df = retomada.file_handler.load_excel(Settings.OUTPUT_FILENAME)
+    assert df["id"].tolist() == list(range(1, Settings.FILTER_TOP_N + 1))
+    assert not os.path.exists(os.path.join(Settings.OUTPUT_DIR, Settings.CHECKPOINT_DIRNAME))
+
+
+def test_retomada_descarta_bytes_apos_o_offset(app):
+    interrompido = _interromper_na_pagina_3(app)
+
+    # Gravação parcial após o último estado consistente
+    with open(interrompido.records_path, "a", encoding="utf-8") as f:
+        f.write('{"id": 21, "name": "incomp')
+
+    checkpoint = CheckpointManager(FINGERPRINT, resume=True)
+
+    assert os.path.getsize(checkpoint.records_path) == checkpoint.state["offset"]
+    assert [u["id"] for u in checkpoint.load_records()] == list(range(1, 2 * PAGE_SIZE + 1))
+
+
+def test_checkpoint_de_outra_configuracao_e_descartado(app):
+    _interromper_na_pagina_3(app)
+
+    checkpoint = CheckpointManager("outra", resume=True)
+
+    assert checkpoint.next_page == 1
+    assert checkpoint.load_records() == []
+
+    dados, _ = _coletar(app, checkpoint)
+    assert app.paginas == [1, 2, 3]
+    assert len(dados) == TOTAL
+
+
+def test_sem_paginacao_usuarios_nao_vao_para_o_checkpoint(app, monkeypatch):
+    monkeypatch.setattr(Settings, "API_PAGE_SIZE", None)
+    monkeypatch.setattr(Settings, "API_RELATED_ENDPOINTS", {"posts": "/posts"})
+    monkeypatch.setattr(app.api_client, "fetch_users", lambda plan=None: [_usuario(i) for i in range(1, 4)])
+    monkeypatch.setattr(
+        app.api_client, "fetch_related",
+        lambda plan=None, endpoints=None: {"posts": [{"id": 1, "userId": 1}]}
+    )
+
+    checkpoint = CheckpointManager(FINGERPRINT)
+    dados, relacionados = _coletar(app, checkpoint)
+
+    assert len(dados) == 3
+    assert relacionados == {"posts": [{"id": 1, "userId": 1}]}
+    assert not os.path.exists(checkpoint.records_path)
+
+    with open(checkpoint.state_path, encoding="utf-8") as f:
+        assert json.load(f)["relacionados"] == ["posts"]
@@ -0,0 +1,79 @@
+"""
+Regressão: uma exportação com falha não pode deixar chaves de deduplicação
+registradas, senão a nova tentativa descarta os próprios registros
+"""
+
+import pytest
+from config.settings import Settings, settings
+from app.main import Application
+
+N_USUARIOS = 10
+
+
+def _usuarios():
+    """Usuários válidos no formato da API"""
+    return [
+        {
+            "id": i,
+            "name": f"Usuário {i}",
+            "username": f"usuario{i}",
+            "email": f"usuario{i}@exemplo.com",
+            "phone": "1-770-736-8031",
+            "website": f"site{i}.org",
+        }
+        for i in range(1, N_USUARIOS + 1)
+    ]
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Aplicação com API simulada e a primeira exportação Excel falhando"""
+    monkeypatch.setattr(Settings, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(Settings, "DEDUP_ENABLED", True)
+    monkeypatch.setattr(Settings, "DEDUP_ACROSS_RUNS", True)
+    monkeypatch.setattr(Settings, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(Settings, "CHECKPOINT_ENABLED", False)
+    monkeypatch.setattr(Settings, "SHARD_COUNT", 2)
+    monkeypatch.setattr(Settings, "SHARD_POLL_SECONDS", 0)
+    monkeypatch.setenv("SHARD_RUN_ID", "teste")
+
+    application = Application()
+    monkeypatch.setattr(application.scheduler, "pode_executar", lambda: True)
+    monkeypatch.setattr(
+        application.api_client, "fetch_users",
+        lambda plan=None: [plan.project(u) for u in _usuarios() if plan.matches(u)]
+    )
+    monkeypatch.setattr(application.api_client, "fetch_related", lambda plan=None, endpoints=None: {})
+
+    save_to_excel = application.file_handler.save_to_excel
+    chamadas = []
+
+    def save_falhando_uma_vez(df, filename=None):
+        chamadas.append(filename)
+        if len(chamadas) == 1:
+            return False
+        return save_to_excel(df, filename)
+
+    monkeypatch.setattr(application.file_handler, "save_to_excel", save_falhando_uma_vez)
+    return application
+
+
+def _ids_exportados(application):
+    df = application.file_handler.load_excel(settings.OUTPUT_FILENAME)
+    assert df is not None
+    return sorted(df["id"].tolist())
+
+
+def test_nova_tentativa_apos_falha_na_exportacao(app):
+    assert app.executar() is False
+    assert app.executar() is True
+
+    assert _ids_exportados(app) == list(range(1, settings.FILTER_TOP_N + 1))
+
+
+def test_shard_reprocessado_apos_falha_na_exportacao(app):
+    app.shard_mode = True
+
+    assert app.executar() is True
+
+    assert _ids_exportados(app) == list(range(1, settings.FILTER_TOP_N + 1))
@@ -0,0 +1,74 @@
+"""
+Deduplicação em services/deduplicator.py
+"""
+
+import pytest
+from config.settings import Settings
+from services.deduplicator import Deduplicator
+
+
+@pytest.fixture(autouse=True)
+def output_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Settings, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(Settings, "DEDUP_EXPECTED_ITEMS", 1000)
+    return tmp_path
+
+
+def test_chave_gravada_por_outra_instancia_e_repetida():
+    a = Deduplicator(keys=["email"], across_runs=True)
+    b = Deduplicator(keys=["email"], across_runs=True)
+
+    assert not a.is_duplicate({"email": "x@y.com"})
+    a.commit()
+
+    assert b.is_duplicate({"email": "X@y.com"})
+
+
+def test_repetidos_na_mesma_execucao_e_rollback():
+    dedup = Deduplicator(keys=["id", "email"], across_runs=True)
+
+    assert dedup.filter([{"id": 1, "email": "a@b.com"}, {"id": 1, "email": "c@d.com"}]) == [
+        {"id": 1, "email": "a@b.com"}
+    ]
+    dedup.rollback()
+
+    assert not dedup.is_duplicate({"id": 1, "email": "a@b.com"})
+
+
+def test_armazenamento_temporario_em_disco_removido_ao_fechar(output_dir):
+    dedup = Deduplicator(keys=["id"], across_runs=False)
+
+    assert dedup.store_path.startswith(str(output_dir))
+    assert not dedup.is_duplicate({"id": 1})
+    assert dedup.is_duplicate({"id": 1})
+
+    dedup.close()
+
+    assert list(output_dir.iterdir()) == []
+
+
+def test_chaves_pendentes_nao_bloqueiam_outra_instancia():
+    a = Deduplicator(keys=["id"], across_runs=True)
+    b = Deduplicator(keys=["id"], across_runs=True)
+    b.conn.execute("PRAGMA busy_timeout = 0")
+
+    assert not a.is_duplicate({"id": 1})
+    assert not b.is_duplicate({"id": 2})
+    b.commit()
+
+    a.commit()
+    assert a.is_duplicate({"id": 2})
+    assert Deduplicator(keys=["id"], across_runs=True).is_duplicate({"id": 1})
+
+
+def test_conflito_entre_instancias_no_commit():
+    a = Deduplicator(keys=["id"], across_runs=True)
+    b = Deduplicator(keys=["id"], across_runs=True)
+
+    assert not a.is_duplicate({"id": 1})
+    assert not b.is_duplicate({"id": 1})
+    a.commit()
+    b.commit()
+
+    assert b.conn.execute("SELECT COUNT(*) FROM pendentes").fetchone()[0] == 0
+    assert b.is_duplicate({"id": 1})
@@ -0,0 +1,75 @@
+"""
+Detecção do fim da paginação na coleta de usuários
+"""
+
+import json
+import pytest
+from config.settings import Settings, settings
+from services.api_client import APIClient
+
+TOTAL = 25
+PAGE_SIZE = 10
+
+
+class _Resposta:
+    """Resposta HTTP mínima usada pelo APIClient"""
+
+    def __init__(self, itens):
+        self.status_code = 200
+        self.headers = {}
+        self.text = json.dumps(itens)
+        self.content = self.text.encode()
+
+    def json(self):
+        return json.loads(self.text)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(Settings, "API_PAGE_SIZE", PAGE_SIZE)
+    monkeypatch.setattr(Settings, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(Settings, "QUERY_PUSHDOWN_ENABLED", False)
+    return APIClient()
+
+
+def _api(client, monkeypatch, paginar=True, limitar=True):
+    """Simula a API; `paginar`/`limitar` controlam se _page/_limit são respeitados"""
+    itens = [{"id": i} for i in range(1, TOTAL + 1)]
+    chamadas = []
+
+    def get(url, params=None):
+        chamadas.append(dict(params))
+        if not limitar:
+            return _Resposta(itens)
+        page = params[settings.API_PAGE_PARAM] if paginar else 1
+        return _Resposta(itens[(page - 1) * PAGE_SIZE:page * PAGE_SIZE])
+
+    monkeypatch.setattr(client, "_get", get)
+    return chamadas
+
+
+def test_pagina_incompleta_encerra_sem_requisicao_extra(client, monkeypatch):
+    chamadas = _api(client, monkeypatch)
+
+    dados = client.fetch_users()
+
+    assert [u["id"] for u in dados] == list(range(1, TOTAL + 1))
+    assert len(chamadas) == 3
+
+
+def test_api_que_ignora_limit_encerra_na_primeira_pagina(client, monkeypatch):
+    chamadas = _api(client, monkeypatch, limitar=False)
+
+    dados = client.fetch_users()
+
+    assert len(dados) == TOTAL
+    assert len(chamadas) == 1
+
+
+def test_api_que_ignora_page_encerra_na_pagina_repetida(client, monkeypatch):
+    chamadas = _api(client, monkeypatch, paginar=False)
+
+    dados = client.fetch_users()
+
+    assert [u["id"] for u in dados] == list(range(1, PAGE_SIZE + 1))
+    assert len(chamadas) == 2
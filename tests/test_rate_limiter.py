@@ -0,0 +1,131 @@
+"""
+Limitador de taxa em utils/rate_limiter.py e novas tentativas do APIClient
+"""
+
+import sqlite3
+import time
+from email.utils import formatdate
+import pytest
+from config.settings import Settings
+from services.api_client import APIClient
+from utils.rate_limiter import TokenBucket, parse_retry_after
+
+AGORA = 1_700_000_000.0
+
+
+class _Resposta:
+    """Resposta HTTP mínima usada pelo APIClient"""
+
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def _bloqueado_por(bucket):
+    """Segundos restantes do bloqueio de um bucket em memória"""
+    return bucket._state[2] - time.time()
+
+
+def test_retry_after_em_segundos():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after(" 3 ") == 3.0
+
+
+def test_retry_after_em_data_http():
+    valor = formatdate(AGORA + 30, usegmt=True)
+
+    assert parse_retry_after(valor, now=AGORA) == pytest.approx(30.0)
+    assert parse_retry_after(formatdate(AGORA - 30, usegmt=True), now=AGORA) == 0.0
+
+
+@pytest.mark.parametrize("valor", [None, "", "amanhã", "-5"])
+def test_retry_after_invalido(valor):
+    assert parse_retry_after(valor, now=AGORA) is None
+
+
+def test_429_com_retry_after_bloqueia_bucket():
+    bucket = TokenBucket(rate=10, capacity=5)
+
+    assert bucket.observe(429, {"Retry-After": "2"}) == 2.0
+    assert _bloqueado_por(bucket) == pytest.approx(2.0, abs=0.1)
+    assert bucket._state[0] == 0.0
+
+
+def test_ratelimit_reset_em_epoch():
+    bucket = TokenBucket(rate=10, capacity=5)
+
+    wait = bucket.observe(200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(time.time() + 5)})
+
+    assert wait == pytest.approx(5.0, abs=0.1)
+    assert _bloqueado_por(bucket) == pytest.approx(5.0, abs=0.1)
+
+
+def test_ratelimit_reset_em_segundos():
+    bucket = TokenBucket(rate=10, capacity=5)
+
+    assert bucket.observe(200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "7"}) == 7.0
+    assert bucket.observe(200, {"X-RateLimit-Remaining": "3", "X-RateLimit-Reset": "7"}) is None
+
+
+def test_acquire_respeita_a_taxa():
+    bucket = TokenBucket(rate=20, capacity=1)
+
+    inicio = time.perf_counter()
+    for _ in range(5):
+        bucket.acquire()
+    decorrido = time.perf_counter() - inicio
+
+    # O primeiro token está disponível; os outros 4 chegam a 20/s
+    assert 0.18 <= decorrido < 1.0
+
+
+def test_linha_do_bucket_removida_e_recriada(tmp_path):
+    path = str(tmp_path / "rate_limit.sqlite3")
+    bucket = TokenBucket(rate=100, capacity=5, name="api", path=path)
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("DELETE FROM buckets")
+
+    assert bucket.acquire() == 0.0
+    tokens = conn.execute("SELECT tokens FROM buckets WHERE nome = 'api'").fetchone()[0]
+    assert tokens == pytest.approx(4.0, abs=0.1)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """APIClient com bucket próprio e sessão HTTP simulada"""
+    monkeypatch.setattr(Settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(Settings, "RATE_LIMIT_SHARED", False)
+    client = APIClient()
+    client.rate_limiter = TokenBucket(rate=1000, capacity=10)
+    return client
+
+
+def _sessao(client, monkeypatch, respostas):
+    """Faz a sessão HTTP devolver `respostas` em ordem"""
+    chamadas = []
+
+    class _Sessao:
+        def get(self, url, params=None, timeout=None):
+            chamadas.append(url)
+            return respostas[min(len(chamadas), len(respostas)) - 1]
+
+    monkeypatch.setattr(client, "_get_session", lambda: _Sessao())
+    return chamadas
+
+
+def test_get_repete_apos_429(client, monkeypatch):
+    chamadas = _sessao(client, monkeypatch, [
+        _Resposta(429, {"Retry-After": "0"}),
+        _Resposta(200),
+    ])
+
+    assert client._get("http://api/users").status_code == 200
+    assert len(chamadas) == 2
+
+
+def test_get_desiste_apos_max_tentativas(client, monkeypatch):
+    chamadas = _sessao(client, monkeypatch, [_Resposta(429, {"Retry-After": "0"})])
+
+    assert client._get("http://api/users").status_code == 429
+    assert len(chamadas) == Settings.RATE_LIMIT_MAX_RETRIES + 1
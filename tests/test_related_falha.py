@@ -0,0 +1,85 @@
+"""
+Um recurso relacionado indisponível faz a tentativa falhar, em vez de
+exportar registros sem as colunas dele
+"""
+
+import pytest
+from config.settings import Settings, settings
+from app.main import Application
+
+N_USUARIOS = 10
+
+
+def _usuarios():
+    """Usuários válidos no formato da API"""
+    return [
+        {
+            "id": i,
+            "name": f"Usuário {i}",
+            "username": f"usuario{i}",
+            "email": f"usuario{i}@exemplo.com",
+            "phone": "1-770-736-8031",
+            "website": f"site{i}.org",
+        }
+        for i in range(1, N_USUARIOS + 1)
+    ]
+
+
+def _posts():
+    """Dois posts por usuário"""
+    return [{"id": i, "userId": i % N_USUARIOS + 1} for i in range(2 * N_USUARIOS)]
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Aplicação com API simulada e a primeira busca de posts falhando"""
+    monkeypatch.setattr(Settings, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(Settings, "DEDUP_ENABLED", True)
+    monkeypatch.setattr(Settings, "DEDUP_ACROSS_RUNS", True)
+    monkeypatch.setattr(Settings, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(Settings, "CHECKPOINT_ENABLED", False)
+    monkeypatch.setattr(Settings, "SHARD_COUNT", 2)
+    monkeypatch.setattr(Settings, "SHARD_POLL_SECONDS", 0)
+    monkeypatch.setenv("SHARD_RUN_ID", "teste")
+
+    application = Application()
+    monkeypatch.setattr(application.scheduler, "pode_executar", lambda: True)
+    monkeypatch.setattr(
+        application.api_client, "fetch_users",
+        lambda plan=None: [plan.project(u) for u in _usuarios() if plan.matches(u)]
+    )
+
+    chamadas = []
+
+    def fetch_related(plan=None, endpoints=None):
+        chamadas.append(plan)
+        return {"posts": None if len(chamadas) == 1 else _posts()}
+
+    monkeypatch.setattr(application.api_client, "fetch_related", fetch_related)
+    return application
+
+
+def _exportados(application):
+    df = application.file_handler.load_excel(settings.OUTPUT_FILENAME)
+    assert df is not None
+    return df.sort_values("id")
+
+
+def test_falha_em_recurso_relacionado_falha_a_tentativa(app):
+    assert app.executar() is False
+    assert app.file_handler.load_excel(settings.OUTPUT_FILENAME) is None
+
+    assert app.executar() is True
+    df = _exportados(app)
+    assert df["id"].tolist() == list(range(1, settings.FILTER_TOP_N + 1))
+    assert (df["total_posts"] == 2).all()
+
+
+def test_shard_com_recurso_indisponivel_e_reprocessado(app):
+    app.shard_mode = True
+
+    assert app.executar() is True
+
+    df = _exportados(app)
+    assert df["id"].tolist() == list(range(1, settings.FILTER_TOP_N + 1))
+    assert (df["total_posts"] == 2).all()
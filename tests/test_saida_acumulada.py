@@ -0,0 +1,59 @@
+"""
+Com DEDUP_ACROSS_RUNS o Excel e o resumo acumulam as execuções
+"""
+
+import pytest
+from config.settings import Settings, settings
+from app.main import Application
+
+
+def _usuario(i):
+    return {
+        "id": i,
+        "name": f"Usuário {i}",
+        "username": f"usuario{i}",
+        "email": f"usuario{i}@exemplo.com",
+        "phone": "1-770-736-8031",
+        "website": f"site{i}.org",
+    }
+
+
+@pytest.fixture
+def executar(tmp_path, monkeypatch):
+    """Executa a aplicação com a API devolvendo os IDs informados"""
+    monkeypatch.setattr(Settings, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(Settings, "DEDUP_ENABLED", True)
+    monkeypatch.setattr(Settings, "DEDUP_ACROSS_RUNS", True)
+    monkeypatch.setattr(Settings, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(Settings, "CHECKPOINT_ENABLED", False)
+
+    def run(ids, shard=False):
+        application = Application(shard_mode=shard)
+        monkeypatch.setattr(application.scheduler, "pode_executar", lambda: True)
+        monkeypatch.setattr(
+            application.api_client, "fetch_users",
+            lambda plan=None: [plan.project(_usuario(i)) for i in ids if plan.matches(_usuario(i))]
+        )
+        monkeypatch.setattr(application.api_client, "fetch_related", lambda plan=None, endpoints=None: {})
+        try:
+            assert application.executar() is True
+            return application
+        finally:
+            application.encerrar()
+
+    return run
+
+
+@pytest.mark.parametrize("shard", [False, True])
+def test_execucoes_acumulam_saida_e_resumo(executar, monkeypatch, shard):
+    monkeypatch.setenv("SHARD_RUN_ID", "primeira")
+    executar([1, 2, 3], shard)
+    monkeypatch.setenv("SHARD_RUN_ID", "segunda")
+    application = executar([1, 2, 3, 4, 5], shard)
+
+    df = application.file_handler.load_excel(settings.OUTPUT_FILENAME)
+    assert sorted(df["id"].tolist()) == [1, 2, 3, 4, 5]
+
+    summary = application.file_handler.load_summary()
+    assert summary["total_registros"] == 5
+    assert summary["novos_registros"] == 2
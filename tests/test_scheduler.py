@@ -0,0 +1,30 @@
+"""
+Espera pelo horário de execução (--wait)
+"""
+
+from datetime import datetime, timedelta
+from app import scheduler
+from app.scheduler import ScheduleManager
+
+
+def test_esperar_horario_dorme_ate_o_horario_permitido(monkeypatch):
+    esperas = []
+    monkeypatch.setattr(scheduler.time, "sleep", esperas.append)
+
+    manager = ScheduleManager()
+    manager.horario_permitido = (datetime.now() + timedelta(hours=1)).strftime("%H:%M")
+    manager.esperar_horario()
+
+    assert len(esperas) == 1
+    assert 0 < esperas[0] <= 3600
+
+
+def test_esperar_horario_no_horario_nao_dorme(monkeypatch):
+    esperas = []
+    monkeypatch.setattr(scheduler.time, "sleep", esperas.append)
+
+    manager = ScheduleManager()
+    manager.horario_permitido = datetime.now().strftime("%H:%M")
+    manager.esperar_horario()
+
+    assert esperas == []
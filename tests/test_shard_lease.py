@@ -0,0 +1,55 @@
+"""
+Renovação do lease de um shard em segundo plano
+"""
+
+import time
+import pytest
+from config.settings import Settings
+from services.shard_coordinator import LeaseRenewer, ShardCoordinator
+
+LEASE = 1
+
+
+@pytest.fixture
+def coordinator(tmp_path, monkeypatch):
+    """Coordenador com lease curto em diretório temporário"""
+    monkeypatch.setattr(Settings, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(Settings, "SHARD_COUNT", 1)
+    monkeypatch.setattr(Settings, "SHARD_LEASE_SECONDS", LEASE)
+    coord = ShardCoordinator(run_id="teste", owner="instancia-1")
+    coord.initialize()
+    return coord
+
+
+def test_lease_renovado_durante_etapa_longa(coordinator):
+    shard = coordinator.claim()
+    renovador = LeaseRenewer(coordinator.run_id, coordinator.owner, shard["shard_id"], interval=0.1)
+    renovador.start()
+    try:
+        time.sleep(LEASE * 2)
+
+        outra = ShardCoordinator(run_id="teste", owner="instancia-2")
+        assert outra.claim() is None
+        assert renovador.held()
+    finally:
+        renovador.stop()
+
+    assert coordinator.complete(shard["shard_id"])
+
+
+def test_lease_assumido_por_outra_instancia_e_detectado(coordinator):
+    shard = coordinator.claim()
+    time.sleep(LEASE + 0.1)
+
+    outra = ShardCoordinator(run_id="teste", owner="instancia-2")
+    assert outra.claim()["shard_id"] == shard["shard_id"]
+
+    renovador = LeaseRenewer(coordinator.run_id, coordinator.owner, shard["shard_id"], interval=0.05)
+    renovador.start()
+    try:
+        renovador.join(timeout=2)
+        assert not renovador.held()
+    finally:
+        renovador.stop()
+
+    assert not coordinator.complete(shard["shard_id"])
@@ -0,0 +1,45 @@
+"""
+Reset do estado de uma execução de shards
+"""
+
+import pytest
+from config.settings import Settings
+from services.shard_coordinator import ShardCoordinator
+
+
+@pytest.fixture
+def coordinator(tmp_path, monkeypatch):
+    """Coordenador com 2 shards em diretório temporário"""
+    monkeypatch.setattr(Settings, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(Settings, "SHARD_COUNT", 2)
+    coord = ShardCoordinator(run_id="teste", owner="instancia-1")
+    coord.initialize()
+    return coord
+
+
+def _concluir_todos(coord):
+    while True:
+        shard = coord.claim()
+        if shard is None:
+            return
+        coord.complete(shard["shard_id"])
+
+
+def test_reset_permite_reprocessar_execucao_concluida(coordinator):
+    _concluir_todos(coordinator)
+    assert coordinator.claim_merge()
+    coordinator.complete_merge()
+    assert coordinator.merge_done()
+
+    assert coordinator.reset() == 2
+
+    coordinator.initialize()
+    assert not coordinator.merge_done()
+    assert coordinator.claim() is not None
+
+
+def test_reset_recusado_com_lease_ativo(coordinator):
+    assert coordinator.claim() is not None
+
+    assert coordinator.reset() is None
+    assert not coordinator.all_done()
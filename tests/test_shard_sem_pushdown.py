@@ -0,0 +1,75 @@
+"""
+Com QUERY_PUSHDOWN_ENABLED=false a faixa de IDs de cada shard continua
+sendo aplicada localmente
+"""
+
+import json
+import pytest
+from config.settings import Settings, settings
+from app.main import Application
+
+N_USUARIOS = 10
+
+
+class _Resposta:
+    """Resposta HTTP mínima usada pelo APIClient"""
+
+    def __init__(self, itens):
+        self.status_code = 200
+        self.headers = {}
+        self.text = json.dumps(itens)
+        self.content = self.text.encode()
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def _usuario(i):
+    return {
+        "id": i,
+        "name": f"Usuário {i}",
+        "username": f"usuario{i}",
+        "email": f"usuario{i}@exemplo.com",
+        "phone": "1-770-736-8031",
+        "website": f"site{i}.org",
+    }
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Aplicação em modo shard com uma API que ignora os query params"""
+    monkeypatch.setattr(Settings, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(Settings, "QUERY_PUSHDOWN_ENABLED", False)
+    monkeypatch.setattr(Settings, "DEDUP_ENABLED", False)
+    monkeypatch.setattr(Settings, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(Settings, "CHECKPOINT_ENABLED", False)
+    monkeypatch.setattr(Settings, "SHARD_COUNT", 2)
+    monkeypatch.setattr(Settings, "SHARD_POLL_SECONDS", 0)
+    monkeypatch.setenv("SHARD_RUN_ID", "teste")
+
+    application = Application(shard_mode=True)
+    monkeypatch.setattr(application.scheduler, "pode_executar", lambda: True)
+
+    params_enviados = []
+
+    def get(url, params=None):
+        params_enviados.append(params)
+        if url == settings.get_api_url():
+            return _Resposta([_usuario(i) for i in range(1, N_USUARIOS + 1)])
+        return _Resposta([{"id": i, "userId": i} for i in range(1, N_USUARIOS + 1)])
+
+    monkeypatch.setattr(application.api_client, "_get", get)
+    application.params_enviados = params_enviados
+    return application
+
+
+def test_shards_sem_pushdown_nao_duplicam_registros(app):
+    assert app.executar() is True
+
+    df = app.file_handler.load_excel(settings.OUTPUT_FILENAME)
+    assert df["id"].tolist() == list(range(1, settings.FILTER_TOP_N + 1))
+    assert (df["total_posts"] == 1).all()
+    assert app.file_handler.load_summary()["total_registros"] == settings.FILTER_TOP_N
+
+    # Sem pushdown nenhum filtro vai para a API
+    assert all(params is None for params in app.params_enviados)
@@ -0,0 +1,199 @@
+"""
+Estruturas probabilísticas de utils/sketches.py
+"""
+
+import json
+import random
+from collections import Counter
+import pytest
+from utils.sketches import BloomFilter, FrequentItems, HyperLogLog, QuantileSketch
+
+
+def _roundtrip(sketch):
+    """Serializa via JSON e reconstrói, como no summary_state.json"""
+    return type(sketch).from_state(json.loads(json.dumps(sketch.to_state())))
+
+
+def _peso_total(sketch):
+    return sum(weight for _, weight in sketch._weighted_items())
+
+
+# HyperLogLog
+
+def test_hll_estima_cardinalidade_com_erro_baixo():
+    hll = HyperLogLog(precision=12)
+    for i in range(50000):
+        hll.add(f"valor-{i}")
+        hll.add(f"valor-{i}")
+
+    # Erro padrão ~1.04/sqrt(4096) = 1.6%
+    assert hll.count() == pytest.approx(50000, rel=0.05)
+
+
+def test_hll_cardinalidade_pequena_exata():
+    hll = HyperLogLog(precision=12)
+    for i in range(20):
+        hll.add(i)
+    assert hll.count() == 20
+
+
+def test_hll_merge_equivale_a_uniao():
+    a, b, uniao = HyperLogLog(10), HyperLogLog(10), HyperLogLog(10)
+    for i in range(0, 30000):
+        a.add(i)
+        uniao.add(i)
+    for i in range(20000, 50000):
+        b.add(i)
+        uniao.add(i)
+
+    a.merge(b)
+
+    assert a.registers == uniao.registers
+    assert a.count() == pytest.approx(50000, rel=0.1)
+
+
+def test_hll_merge_recusa_precisao_diferente():
+    with pytest.raises(ValueError):
+        HyperLogLog(10).merge(HyperLogLog(12))
+
+
+def test_hll_roundtrip():
+    hll = HyperLogLog(8)
+    for i in range(1000):
+        hll.add(i)
+    assert _roundtrip(hll).registers == hll.registers
+
+
+# QuantileSketch
+
+def test_quantis_preservam_peso_total():
+    sketch = QuantileSketch(k=32, seed=1)
+    for i in range(10001):
+        sketch.add(i)
+        if i % 997 == 0:
+            assert _peso_total(sketch) == sketch.count
+
+    assert sketch.count == 10001
+    assert _peso_total(sketch) == 10001
+    assert all(len(level) < sketch.k for level in sketch.levels)
+
+
+def test_quantis_aproximados():
+    valores = list(range(100000))
+    random.Random(7).shuffle(valores)
+    sketch = QuantileSketch(k=200, seed=3)
+    for value in valores:
+        sketch.add(value)
+
+    for q in (0.25, 0.5, 0.95):
+        assert sketch.quantile(q) == pytest.approx(q * 100000, abs=0.02 * 100000)
+    assert sketch.quantile(0) == 0
+    assert sketch.quantile(1) == 99999
+
+
+def test_quantis_merge_preserva_peso_e_extremos():
+    a, b = QuantileSketch(k=50, seed=1), QuantileSketch(k=50, seed=2)
+    for i in range(5000):
+        a.add(i)
+    for i in range(5000, 12000):
+        b.add(i)
+
+    a.merge(b)
+
+    assert a.count == 12000
+    assert _peso_total(a) == 12000
+    assert (a.min_value, a.max_value) == (0, 11999)
+    assert a.quantile(0.5) == pytest.approx(6000, abs=0.03 * 12000)
+
+
+def test_quantis_ignoram_nan_e_vazio():
+    sketch = QuantileSketch(k=10)
+    assert sketch.quantile(0.5) is None
+    sketch.add(float("nan"))
+    assert sketch.count == 0
+
+
+def test_quantis_roundtrip():
+    sketch = QuantileSketch(k=20, seed=5)
+    for i in range(500):
+        sketch.add(i * 1.5)
+    restored = _roundtrip(sketch)
+    assert [restored.quantile(q) for q in (0.1, 0.5, 0.9)] == [sketch.quantile(q) for q in (0.1, 0.5, 0.9)]
+    assert _peso_total(restored) == restored.count == 500
+
+
+# FrequentItems (Misra-Gries)
+
+def _fluxo(seed, n=20000):
+    rng = random.Random(seed)
+    pesados = ["a", "b", "c"]
+    return [rng.choice(pesados) if rng.random() < 0.5 else f"raro-{rng.randint(0, 5000)}" for _ in range(n)]
+
+
+def _verifica_limites(sketch, reais):
+    limite = sketch.total / (sketch.capacity + 1)
+    assert len(sketch.counters) <= sketch.capacity
+    for item, real in reais.items():
+        estimado = sketch.counters.get(item, 0)
+        assert real - limite <= estimado <= real
+
+
+def test_frequentes_poda_respeita_limites():
+    fluxo = _fluxo(1)
+    sketch = FrequentItems(capacity=10)
+    sketch.update(fluxo)
+
+    reais = Counter(fluxo)
+    assert sketch.total == len(fluxo)
+    _verifica_limites(sketch, reais)
+    assert {item for item, _ in sketch.top(3)} == {"a", "b", "c"}
+
+
+def test_frequentes_merge_respeita_limites():
+    fluxo_a, fluxo_b = _fluxo(1), _fluxo(2)
+    a, b = FrequentItems(capacity=10), FrequentItems(capacity=10)
+    a.update(fluxo_a)
+    b.update(fluxo_b)
+
+    a.merge(b)
+
+    assert a.total == len(fluxo_a) + len(fluxo_b)
+    _verifica_limites(a, Counter(fluxo_a) + Counter(fluxo_b))
+    assert {item for item, _ in a.top(3)} == {"a", "b", "c"}
+
+
+def test_frequentes_top_ordenado():
+    sketch = FrequentItems(capacity=5)
+    sketch.update(["x"] * 3 + ["y"] * 5 + ["z"])
+    assert sketch.top(2) == [("y", 5), ("x", 3)]
+
+
+def test_frequentes_roundtrip():
+    sketch = FrequentItems(capacity=10)
+    sketch.update(_fluxo(3, n=2000))
+    restored = _roundtrip(sketch)
+    assert restored.top(10) == sketch.top(10)
+    assert restored.total == sketch.total
+
+
+# BloomFilter
+
+def test_bloom_sem_falsos_negativos_e_taxa_controlada():
+    bloom = BloomFilter(capacity=10000, false_positive_rate=0.01)
+    for i in range(10000):
+        bloom.add(f"chave-{i}")
+
+    assert all(f"chave-{i}" in bloom for i in range(10000))
+    falsos = sum(f"outra-{i}" in bloom for i in range(20000))
+    assert falsos / 20000 < 0.02
+
+
+def test_bloom_roundtrip_e_merge():
+    a, b = BloomFilter(1000), BloomFilter(1000)
+    a.add("x")
+    b.add("y")
+    a.merge(b)
+    restored = _roundtrip(a)
+    assert "x" in restored and "y" in restored
+    with pytest.raises(ValueError):
+        a.merge(BloomFilter(10))
@@ -0,0 +1,65 @@
+"""
+Agregador do resumo em services/stream_aggregator.py
+"""
+
+import json
+import pandas as pd
+from services.stream_aggregator import StreamingAggregator
+
+
+def _registros(inicio, fim):
+    return pd.DataFrame({
+        "id": list(range(inicio, fim)),
+        "email": [f"u{i}@dominio{i % 3}.com" for i in range(inicio, fim)],
+        "website": [f"site{i % 4}.org" for i in range(inicio, fim)],
+        "validado": [i % 5 != 0 for i in range(inicio, fim)],
+    })
+
+
+def test_merge_de_parciais_equivale_a_uma_passada():
+    unico = StreamingAggregator()
+    unico.update(_registros(0, 600))
+
+    a, b = StreamingAggregator(), StreamingAggregator()
+    a.update(_registros(0, 250))
+    b.update(_registros(250, 600))
+    a.merge(b)
+
+    ra, ru = a.result(), unico.result()
+    assert ra["total_registros"] == ru["total_registros"] == 600
+    assert a.registros_validos == unico.registros_validos == 480
+    assert ra["top_dominios_email"] == ru["top_dominios_email"]
+    assert ra["top_websites"] == ru["top_websites"]
+    assert ra["colunas"]["id"]["distintos_estimados"] == ru["colunas"]["id"]["distintos_estimados"]
+    assert ra["colunas"]["id"]["min"] == 0 and ra["colunas"]["id"]["max"] == 599
+
+
+def test_roundtrip_de_estado():
+    aggregator = StreamingAggregator()
+    aggregator.update(_registros(0, 300))
+
+    restored = StreamingAggregator.from_state(json.loads(json.dumps(aggregator.to_state())))
+
+    assert restored.result() == aggregator.result()
+    assert restored.registros_validos == aggregator.registros_validos
+
+
+def test_estado_antigo_sem_registros_validos():
+    state = StreamingAggregator().to_state()
+    del state["registros_validos"]
+    assert StreamingAggregator.from_state(state).registros_validos == 0
+
+
+def test_resumo_com_estado_anterior_tem_totais_consistentes():
+    from services.data_processor import DataProcessor
+
+    anterior = StreamingAggregator()
+    anterior.update(_registros(0, 100))
+    atual = StreamingAggregator()
+    atual.update(_registros(100, 130))
+
+    summary = DataProcessor().generate_summary(atual, anterior)
+
+    assert summary["total_registros"] == summary["estatisticas"]["total_registros"] == 130
+    assert summary["novos_registros"] == 30
+    assert summary["registros_validos"] == 104
@@ -0,0 +1,240 @@
+"""
+Limitador de taxa (token bucket) para chamadas à API
+
+O estado pode ficar em memória (compartilhado entre threads) ou em um
+arquivo SQLite (compartilhado entre processos/containers do mesmo host).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Mapping, Optional, Tuple
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Interpreta o header Retry-After (segundos ou data HTTP)
+
+    Args:
+        value: Valor do header
+        now: Instante atual (epoch), para testes
+
+    Returns:
+        Segundos de espera ou None se ausente/inválido
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    now = time.time() if now is None else now
+    return max(0.0, retry_at.timestamp() - now)
+
+
+class TokenBucket:
+    """
+    Token bucket com `rate` tokens por segundo e capacidade `capacity`
+
+    Cada requisição consome um token; sem tokens, `acquire` dorme o tempo
+    necessário. Respostas 429 ou headers de rate limit bloqueiam o bucket
+    até o instante indicado pelo servidor, para todos que o compartilham.
+    """
+
+    def __init__(self, rate: float, capacity: float, name: str = "default",
+                 path: Optional[str] = None):
+        if rate <= 0 or capacity < 1:
+            raise ValueError(f"Rate limit inválido: rate={rate}, capacity={capacity}")
+
+        self.rate = rate
+        self.capacity = capacity
+        self.name = name
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._state = (capacity, time.time(), 0.0)
+
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = self._connection()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS buckets (
+                    nome TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    atualizado REAL NOT NULL,
+                    bloqueado_ate REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "INSERT OR IGNORE INTO buckets (nome, tokens, atualizado, bloqueado_ate) VALUES (?, ?, ?, 0)",
+                (self.name, capacity, time.time())
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Retorna a conexão SQLite da thread atual"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _update(self, func):
+        """
+        Aplica `func(tokens, atualizado, bloqueado_ate)` ao estado atomicamente
+
+        `func` retorna (novo_estado, resultado).
+        """
+        with self._lock:
+            if not self.path:
+                self._state, result = func(*self._state)
+                return result
+
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT tokens, atualizado, bloqueado_ate FROM buckets WHERE nome = ?",
+                    (self.name,)
+                ).fetchone()
+                if row is None:
+                    # Linha removida por outro processo: recomeça com o bucket cheio
+                    logger.warning(f"⚠ Rate limit {self.name}: estado ausente, bucket recriado")
+                    row = (self.capacity, time.time(), 0.0)
+
+                state, result = func(*row)
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (nome, tokens, atualizado, bloqueado_ate) VALUES (?, ?, ?, ?)",
+                    (self.name, *state)
+                )
+                conn.execute("COMMIT")
+                return result
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _try_take(self, tokens: float):
+        """Cria a função de atualização que tenta consumir `tokens`"""
+        def take(available: float, updated: float, blocked_until: float) -> Tuple[Tuple[float, float, float], float]:
+            now = time.time()
+            available = min(self.capacity, available + max(0.0, now - updated) * self.rate)
+
+            if now < blocked_until:
+                return (available, now, blocked_until), blocked_until - now
+
+            if available >= tokens:
+                return (available - tokens, now, blocked_until), 0.0
+
+            return (available, now, blocked_until), (tokens - available) / self.rate
+        return take
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Consome tokens, aguardando se necessário
+
+        Args:
+            tokens: Quantidade de tokens
+
+        Returns:
+            Tempo total aguardado em segundos
+        """
+        waited = 0.0
+        while True:
+            wait = self._update(self._try_take(tokens))
+            if wait <= 0:
+                if waited:
+                    logger.debug(f"Rate limit {self.name}: aguardou {waited:.2f}s")
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    def block_for(self, seconds: float):
+        """
+        Bloqueia o bucket por `seconds` e zera os tokens disponíveis
+
+        Args:
+            seconds: Duração do bloqueio
+        """
+        def block(available: float, updated: float, blocked_until: float):
+            until = max(blocked_until, time.time() + seconds)
+            return (0.0, time.time(), until), None
+
+        self._update(block)
+        logger.warning(f"⚠ Rate limit {self.name}: pausado por {seconds:.1f}s")
+
+    def observe(self, status_code: int, headers: Mapping[str, str]) -> Optional[float]:
+        """
+        Ajusta o bucket a partir de uma resposta da API
+
+        Considera Retry-After (429/503) e X-RateLimit-Remaining/Reset.
+
+        Args:
+            status_code: Status HTTP da resposta
+            headers: Headers da resposta
+
+        Returns:
+            Segundos de bloqueio aplicados ou None
+        """
+        wait = None
+
+        if status_code in (429, 503):
+            wait = parse_retry_after(headers.get("Retry-After"))
+            if wait is None and status_code == 429:
+                wait = max(1.0, 1.0 / self.rate)
+
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if remaining is not None and reset is not None:
+            try:
+                if int(float(remaining)) <= 0:
+                    reset_value = float(reset)
+                    # Alguns servidores enviam epoch, outros segundos restantes
+                    reset_wait = reset_value - time.time() if reset_value > 1e9 else reset_value
+                    wait = max(wait or 0.0, reset_wait)
+            except ValueError:
+                pass
+
+        if wait is not None and wait > 0:
+            self.block_for(wait)
+            return wait
+        return None
+
+
+_shared_limiters = {}
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, rate: float, capacity: float,
+                     path: Optional[str] = None) -> TokenBucket:
+    """
+    Retorna o limitador compartilhado do processo para `name`
+
+    Args:
+        name: Nome do bucket (ex.: host da API)
+        rate: Tokens por segundo
+        capacity: Capacidade (rajada máxima)
+        path: Arquivo SQLite para compartilhar entre processos (opcional)
+
+    Returns:
+        TokenBucket compartilhado
+    """
+    # Conexões SQLite não podem ser herdadas por processos filhos (fork)
+    key = (name, path, os.getpid())
+    with _shared_lock:
+        if key not in _shared_limiters:
+            _shared_limiters[key] = TokenBucket(rate, capacity, name, path)
+        return _shared_limiters[key]
@@ -0,0 +1,366 @@
+"""
+Estruturas probabilísticas (sketches) mescláveis para estatísticas em streaming
+
+Todas as estruturas processam os dados em uma única passada, usam memória
+limitada e podem ser combinadas com `merge` (entre workers ou execuções) e
+serializadas com `to_state`/`from_state` em tipos compatíveis com JSON.
+"""
+
+import base64
+import hashlib
+import math
+import random
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def hash64(value: Any) -> int:
+    """
+    Calcula um hash estável de 64 bits para um valor
+
+    Diferente de `hash()`, o resultado não muda entre processos,
+    o que permite mesclar estados gerados em execuções distintas.
+
+    Args:
+        value: Valor a ser hasheado (convertido para str)
+
+    Returns:
+        Inteiro sem sinal de 64 bits
+    """
+    digest = hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+class HyperLogLog:
+    """Estimador de cardinalidade (número de valores distintos)"""
+
+    def __init__(self, precision: int = 12):
+        if not 4 <= precision <= 18:
+            raise ValueError(f"Precisão inválida para HyperLogLog: {precision}")
+
+        self.precision = precision
+        self.num_registers = 1 << precision
+        self.registers = bytearray(self.num_registers)
+
+    def add(self, value: Any):
+        """Adiciona um valor ao sketch"""
+        hashed = hash64(value)
+        index = hashed >> (64 - self.precision)
+        remaining = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remaining.bit_length() + 1
+
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        """
+        Estima o número de valores distintos
+
+        Returns:
+            Cardinalidade estimada
+        """
+        m = self.num_registers
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw_estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+
+        # Correção para cardinalidades pequenas (linear counting)
+        zeros = self.registers.count(0)
+        if raw_estimate <= 2.5 * m and zeros:
+            return int(round(m * math.log(m / zeros)))
+
+        return int(round(raw_estimate))
+
+    def merge(self, other: "HyperLogLog"):
+        """Mescla outro HyperLogLog de mesma precisão neste"""
+        if other.precision != self.precision:
+            raise ValueError("Não é possível mesclar HyperLogLog com precisões diferentes")
+
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def to_state(self) -> Dict[str, Any]:
+        """Serializa o sketch"""
+        return {
+            "precision": self.precision,
+            "registers": base64.b64encode(bytes(self.registers)).decode("ascii")
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "HyperLogLog":
+        """Reconstrói o sketch a partir de `to_state`"""
+        sketch = cls(state["precision"])
+        sketch.registers = bytearray(base64.b64decode(state["registers"]))
+        return sketch
+
+
+class QuantileSketch:
+    """
+    Sketch de quantis aproximados baseado em compactadores (estilo KLL)
+
+    Cada nível guarda até `k` itens; ao encher, o nível é ordenado e metade
+    dos itens é promovida ao nível seguinte com o dobro do peso.
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        if k < 2:
+            raise ValueError(f"Capacidade inválida para QuantileSketch: {k}")
+
+        self.k = k
+        self.count = 0
+        self.min_value: Optional[float] = None
+        self.max_value: Optional[float] = None
+        self.levels: List[List[float]] = [[]]
+        self._random = random.Random(seed)
+
+    def add(self, value: float):
+        """Adiciona um valor numérico ao sketch"""
+        value = float(value)
+        if math.isnan(value):
+            return
+
+        self.count += 1
+        self.min_value = value if self.min_value is None else min(self.min_value, value)
+        self.max_value = value if self.max_value is None else max(self.max_value, value)
+
+        self.levels[0].append(value)
+        if len(self.levels[0]) >= self.k:
+            self._compress()
+
+    def _compress(self):
+        """Compacta os níveis que excederam a capacidade"""
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) >= self.k:
+                items = sorted(self.levels[level])
+
+                # Item ímpar permanece no nível atual para não perder peso
+                leftover = [items.pop()] if len(items) % 2 else []
+
+                offset = self._random.randint(0, 1)
+                promoted = items[offset::2]
+                self.levels[level] = leftover
+
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                self.levels[level + 1].extend(promoted)
+            level += 1
+
+    def _weighted_items(self) -> List[Tuple[float, int]]:
+        """Retorna os itens ordenados com seus pesos"""
+        items = [
+            (value, 1 << level)
+            for level, values in enumerate(self.levels)
+            for value in values
+        ]
+        items.sort()
+        return items
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estima o valor no quantil `q`
+
+        Args:
+            q: Quantil entre 0 e 1
+
+        Returns:
+            Valor estimado ou None se o sketch estiver vazio
+        """
+        if self.count == 0:
+            return None
+        if q <= 0:
+            return self.min_value
+        if q >= 1:
+            return self.max_value
+
+        items = self._weighted_items()
+        total_weight = sum(weight for _, weight in items)
+        target = q * total_weight
+
+        cumulative = 0
+        for value, weight in items:
+            cumulative += weight
+            if cumulative >= target:
+                return value
+
+        return self.max_value
+
+    def merge(self, other: "QuantileSketch"):
+        """Mescla outro QuantileSketch neste"""
+        if other.count == 0:
+            return
+
+        self.count += other.count
+        self.min_value = other.min_value if self.min_value is None else min(self.min_value, other.min_value)
+        self.max_value = other.max_value if self.max_value is None else max(self.max_value, other.max_value)
+
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, values in enumerate(other.levels):
+            self.levels[level].extend(values)
+
+        self._compress()
+
+    def to_state(self) -> Dict[str, Any]:
+        """Serializa o sketch"""
+        return {
+            "k": self.k,
+            "count": self.count,
+            "min": self.min_value,
+            "max": self.max_value,
+            "levels": [list(values) for values in self.levels]
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "QuantileSketch":
+        """Reconstrói o sketch a partir de `to_state`"""
+        sketch = cls(state["k"])
+        sketch.count = state["count"]
+        sketch.min_value = state["min"]
+        sketch.max_value = state["max"]
+        sketch.levels = [list(values) for values in state["levels"]] or [[]]
+        return sketch
+
+
+class FrequentItems:
+    """
+    Contador de itens mais frequentes (algoritmo Misra-Gries)
+
+    Mantém no máximo `capacity` contadores. Itens com frequência acima de
+    total / (capacity + 1) são sempre mantidos; as contagens podem ser
+    subestimadas em no máximo esse valor.
+    """
+
+    def __init__(self, capacity: int = 64):
+        if capacity < 1:
+            raise ValueError(f"Capacidade inválida para FrequentItems: {capacity}")
+
+        self.capacity = capacity
+        self.total = 0
+        self.counters: Dict[str, int] = {}
+
+    def add(self, item: Any, count: int = 1):
+        """Adiciona ocorrências de um item"""
+        item = str(item)
+        self.total += count
+        self.counters[item] = self.counters.get(item, 0) + count
+
+        if len(self.counters) > self.capacity:
+            self._prune()
+
+    def _prune(self):
+        """Reduz os contadores à capacidade configurada"""
+        ordered = sorted(self.counters.values(), reverse=True)
+        threshold = ordered[self.capacity]
+
+        self.counters = {
+            item: count - threshold
+            for item, count in self.counters.items()
+            if count > threshold
+        }
+
+    def top(self, n: int) -> List[Tuple[str, int]]:
+        """
+        Retorna os `n` itens mais frequentes
+
+        Args:
+            n: Quantidade de itens
+
+        As contagens são limites inferiores: a poda pode tê-las reduzido em
+        até total / (capacity + 1).
+
+        Returns:
+            Lista de tuplas (item, contagem mínima) em ordem decrescente
+        """
+        ordered = sorted(self.counters.items(), key=lambda pair: (-pair[1], pair[0]))
+        return ordered[:n]
+
+    def update(self, items: Iterable[Any]):
+        """Adiciona vários itens de uma vez"""
+        for item in items:
+            self.add(item)
+
+    def merge(self, other: "FrequentItems"):
+        """Mescla outro FrequentItems neste"""
+        self.total += other.total
+        for item, count in other.counters.items():
+            self.counters[item] = self.counters.get(item, 0) + count
+
+        if len(self.counters) > self.capacity:
+            self._prune()
+
+    def to_state(self) -> Dict[str, Any]:
+        """Serializa o sketch"""
+        return {
+            "capacity": self.capacity,
+            "total": self.total,
+            "counters": dict(self.counters)
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "FrequentItems":
+        """Reconstrói o sketch a partir de `to_state`"""
+        sketch = cls(state["capacity"])
+        sketch.total = state["total"]
+        sketch.counters = dict(state["counters"])
+        return sketch
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom para teste rápido de pertinência
+
+    Dimensionado a partir da capacidade esperada e da taxa de falsos
+    positivos; um resultado negativo é sempre correto.
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float = 0.01):
+        if capacity < 1:
+            raise ValueError(f"Capacidade inválida para BloomFilter: {capacity}")
+        if not 0 < false_positive_rate < 1:
+            raise ValueError(f"Taxa de falsos positivos inválida: {false_positive_rate}")
+
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value: Any) -> Iterable[int]:
+        """Calcula as posições de bits do valor (double hashing)"""
+        digest = hashlib.blake2b(str(value).encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, value: Any):
+        """Adiciona um valor ao filtro"""
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: Any) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    def merge(self, other: "BloomFilter"):
+        """Mescla outro BloomFilter de mesmas dimensões neste"""
+        if (other.num_bits, other.num_hashes) != (self.num_bits, self.num_hashes):
+            raise ValueError("Não é possível mesclar BloomFilter com dimensões diferentes")
+
+        self.bits = bytearray(a | b for a, b in zip(self.bits, other.bits))
+        self.count += other.count
+
+    def to_state(self) -> Dict[str, Any]:
+        """Serializa o filtro"""
+        return {
+            "capacity": self.capacity,
+            "false_positive_rate": self.false_positive_rate,
+            "count": self.count,
+            "bits": base64.b64encode(bytes(self.bits)).decode("ascii")
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "BloomFilter":
+        """Reconstrói o filtro a partir de `to_state`"""
+        bloom = cls(state["capacity"], state["false_positive_rate"])
+        bloom.count = state["count"]
+        bloom.bits = bytearray(base64.b64decode(state["bits"]))
+        return bloom